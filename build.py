@@ -9,6 +9,10 @@ import sys
 import platform
 import subprocess
 import shutil
+import stat
+import tarfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # 设置标准输出使用 UTF-8 编码（解决 Windows 命令行中文显示问题）
@@ -27,6 +31,10 @@ DESCRIPTION = "重复文件查找器"
 # PyInstaller 配置
 PYINSTALLER_VERSION = ">=6.0.0"
 
+# 打包配置：低压缩级别 + 大读缓冲区，发布包体积略大但打包快得多
+ARCHIVE_COMPRESS_LEVEL = 1
+ARCHIVE_COPY_BUFSIZE = 1024 * 1024  # 1MB
+
 
 def setup_ci_environment():
     """为 CI 环境设置必要的环境变量"""
@@ -75,21 +83,22 @@ def check_pyinstaller():
 def install_pyinstaller():
     """安装 PyInstaller"""
     print("正在安装 PyInstaller...")
+    cmd = [
+        sys.executable, "-m", "pip", "install", "pyinstaller" + PYINSTALLER_VERSION,
+        "--prefer-binary",
+        "--progress-bar=off",
+    ]
+    if is_ci_environment():
+        # CI 环境无需保留 pip 缓存
+        cmd.append("--no-cache-dir")
+
     try:
-        result = subprocess.run(
-            [sys.executable, "-m", "pip", "install", "pyinstaller" + PYINSTALLER_VERSION],
-            check=True,
-            capture_output=True,
-            text=True
-        )
+        # 不捕获输出，pip 的输出直接实时显示
+        subprocess.run(cmd, check=True)
         print("[OK] PyInstaller 安装成功")
-        if result.stdout:
-            print(result.stdout)
         return True
     except subprocess.CalledProcessError as e:
         print(f"[FAIL] PyInstaller 安装失败: {e}")
-        if e.stderr:
-            print(f"错误输出: {e.stderr}")
         return False
 
 
@@ -112,10 +121,7 @@ a = Analysis(
         'PyQt6.QtCore',
         'PyQt6.QtGui',
         'PyQt6.QtWidgets',
-        'PIL._imaging',
         'send2trash',
-        'imagehash',
-        'cv2',
     ],
     hookspath=[],
     hooksconfig={{}},
@@ -144,7 +150,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,  # 不压缩解释器，避免每次启动时在内存中解压
     console=False,  # GUI 模式，不显示控制台窗口
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -160,7 +166,7 @@ coll = COLLECT(
     a.zipfiles,
     a.datas,
     strip=False,
-    upx=True,
+    upx=False,  # Python/Qt 动态库经 UPX 压缩后每次启动都要解压
     upx_exclude=[],
     name='{APP_NAME}',
 )
@@ -173,31 +179,37 @@ coll = COLLECT(
     print(f"[OK] 创建 spec 文件: {APP_NAME}.spec")
 
 
-def build_executable(platform_name):
+def _pyinstaller_env(config_dir):
+    """config_dir 不为空时让 PyInstaller 使用独立的缓存目录（--clean 只清理该目录）"""
+    if config_dir is None:
+        return None
+    return dict(os.environ, PYINSTALLER_CONFIG_DIR=os.path.abspath(config_dir))
+
+
+def build_executable(platform_name, dist_path='dist', work_path='build', config_dir=None):
     """编译可执行文件"""
     print(f"\n{'='*50}")
     print(f"开始编译 {platform_name} 版本...")
     print(f"{'='*50}\n")
 
-    # 清理旧的构建文件
-    build_dirs = ['build', 'dist', f'{APP_NAME}.spec']
-    for dir_name in build_dirs:
-        if os.path.exists(dir_name):
-            if os.path.isdir(dir_name):
-                shutil.rmtree(dir_name)
-            else:
-                os.remove(dir_name)
+    # 清理旧的构建目录：删除操作在线程中并行执行，同时生成新的 spec 文件
+    # （spec 文件直接覆盖写入，无需先删除）
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for dir_name in (work_path, dist_path):
+            executor.submit(shutil.rmtree, dir_name, ignore_errors=True)
 
-    # 创建 spec 文件
-    create_spec_file()
+        # 创建 spec 文件
+        create_spec_file()
 
-    # PyInstaller 命令（使用 spec 文件时不允许额外的命令行选项）
-    # 所有配置已在 spec 文件中定义
+    # PyInstaller 命令（使用 spec 文件时只允许少数命令行选项）
+    # 其余配置已在 spec 文件中定义
     cmd = [
         'pyinstaller',
         '--clean',
         f'{APP_NAME}.spec',
         '--noconfirm',
+        '--distpath', dist_path,
+        '--workpath', work_path,
     ]
 
     # 执行编译
@@ -206,7 +218,7 @@ def build_executable(platform_name):
     print()
 
     try:
-        result = subprocess.run(cmd, check=True, capture_output=False)
+        result = subprocess.run(cmd, check=True, capture_output=False, env=_pyinstaller_env(config_dir))
         print(f"\n[OK] {platform_name} 版本编译成功!")
         return True
     except subprocess.CalledProcessError as e:
@@ -214,13 +226,101 @@ def build_executable(platform_name):
         return False
 
 
-def package_executable(platform_name):
+def build_cli_executable(dist_path='dist', work_path='build', config_dir=None):
+    """编译 CLI 版本可执行文件"""
+    # 创建 CLI spec 文件
+    create_cli_spec()
+
+    cmd = [
+        'pyinstaller',
+        '--clean',
+        f'{APP_NAME}-cli.spec',
+        '--noconfirm',
+        '--distpath', dist_path,
+        '--workpath', work_path,
+    ]
+
+    print("执行命令:")
+    print(" ".join(cmd))
+
+    try:
+        subprocess.run(cmd, check=True, env=_pyinstaller_env(config_dir))
+        print(f"\n[OK] CLI 版本编译成功!")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"\n[FAIL] CLI 版本编译失败: {e}")
+        return False
+
+
+def tar_gz_directory(src_dir, output_file):
+    """将目录打包为 tar.gz（优先使用多线程的 pigz，否则回退到 tarfile）"""
+    src_dir = Path(src_dir)
+    tar_bin = shutil.which('tar')
+    pigz_bin = shutil.which('pigz')
+
+    if tar_bin and pigz_bin:
+        # tar 输出直接通过管道交给 pigz，在所有 CPU 核心上并行压缩
+        with open(output_file, 'wb') as out:
+            tar_proc = subprocess.Popen(
+                [tar_bin, '-cf', '-', '-C', str(src_dir.parent), src_dir.name],
+                stdout=subprocess.PIPE,
+                bufsize=ARCHIVE_COPY_BUFSIZE
+            )
+            pigz_proc = subprocess.Popen(
+                [pigz_bin, f'-{ARCHIVE_COMPRESS_LEVEL}', '-p', str(os.cpu_count() or 1)],
+                stdin=tar_proc.stdout,
+                stdout=out
+            )
+            tar_proc.stdout.close()
+            pigz_proc.wait()
+            tar_proc.wait()
+
+        if tar_proc.returncode == 0 and pigz_proc.returncode == 0:
+            return
+        print("[WARN] pigz 打包失败，改用 tarfile")
+
+    with tarfile.open(
+        output_file, 'w:gz',
+        compresslevel=ARCHIVE_COMPRESS_LEVEL,
+        copybufsize=ARCHIVE_COPY_BUFSIZE
+    ) as tar:
+        tar.add(src_dir, arcname=src_dir.name)
+
+
+def zip_directory(src_dir, zip_path):
+    """将目录压缩为 zip 文件（保留符号链接，等价于 zip -r -y）"""
+    src_dir = Path(src_dir)
+    base_dir = src_dir.parent
+
+    with zipfile.ZipFile(
+        zip_path, 'w', zipfile.ZIP_DEFLATED,
+        compresslevel=ARCHIVE_COMPRESS_LEVEL,
+        allowZip64=True
+    ) as zf:
+        for root, dirs, files in os.walk(src_dir):
+            root_path = Path(root)
+            zf.write(root_path, root_path.relative_to(base_dir))
+
+            for name in dirs + files:
+                path = root_path / name
+                arcname = str(path.relative_to(base_dir))
+                if path.is_symlink():
+                    # 以符号链接形式写入（.app 中的 Frameworks 依赖符号链接）
+                    info = zipfile.ZipInfo(arcname)
+                    info.create_system = 3  # Unix
+                    info.external_attr = (stat.S_IFLNK | 0o777) << 16
+                    zf.writestr(info, os.readlink(path))
+                elif name in files:
+                    zf.write(path, arcname)
+
+
+def package_executable(platform_name, dist_path='dist'):
     """打包可执行文件"""
     print(f"\n{'='*50}")
     print(f"打包 {platform_name} 版本...")
     print(f"{'='*50}\n")
 
-    dist_dir = Path('dist')
+    dist_dir = Path(dist_path)
     output_dir = Path('release')
     output_dir.mkdir(exist_ok=True)
 
@@ -229,36 +329,37 @@ def package_executable(platform_name):
         app_path = dist_dir / f'{APP_NAME}.app'
         if app_path.exists():
             output_file = output_dir / f'{APP_NAME}-{VERSION}-macos.app'
-            shutil.copytree(app_path, output_file)
+            shutil.copytree(app_path, output_file, symlinks=True)
             print(f"[OK] macOS 应用包: {output_file}")
 
             # 创建压缩包
-            zip_cmd = ['zip', '-r', '-y', str(output_file.with_suffix('.zip')), str(output_file.name)]
-            subprocess.run(zip_cmd, check=True)
+            zip_directory(output_file, output_file.with_suffix('.zip'))
             print(f"[OK] macOS 压缩包: {output_file.with_suffix('.zip')}")
             return True
 
     elif platform_name == "windows":
-        # Windows: 可执行文件
+        # Windows: 打包整个 onedir 目录（exe 依赖同目录下的 _internal/）
         exe_path = dist_dir / f'{APP_NAME}/{APP_NAME}.exe'
         if exe_path.exists():
-            output_file = output_dir / f'{APP_NAME}-{VERSION}-windows.exe'
-            shutil.copy(exe_path, output_file)
-            print(f"[OK] Windows 可执行文件: {output_file}")
+            output_file = shutil.make_archive(
+                str(output_dir / f'{APP_NAME}-{VERSION}-windows'),
+                'zip',
+                root_dir=dist_dir,
+                base_dir=APP_NAME
+            )
+            print(f"[OK] Windows 压缩包: {output_file}")
             return True
 
     else:  # linux
-        # Linux: 可执行文件
+        # Linux: 打包整个 onedir 目录
         exe_path = dist_dir / f'{APP_NAME}/{APP_NAME}'
         if exe_path.exists():
             # 设置可执行权限
             os.chmod(exe_path, 0o755)
 
             # 创建 tar.gz 压缩包
-            import tarfile
             output_file = output_dir / f'{APP_NAME}-{VERSION}-linux.tar.gz'
-            with tarfile.open(output_file, 'w:gz') as tar:
-                tar.add(exe_path, arcname=APP_NAME)
+            tar_gz_directory(dist_dir / APP_NAME, output_file)
             print(f"[OK] Linux 压缩包: {output_file}")
             return True
 
@@ -286,10 +387,7 @@ a = Analysis(
         'PyQt6.QtCore',
         'PyQt6.QtGui',
         'PyQt6.QtWidgets',
-        'PIL._imaging',
         'send2trash',
-        'imagehash',
-        'cv2',
     ],
     hookspath=[],
     hooksconfig={{}},
@@ -318,7 +416,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,  # 不压缩解释器，避免每次启动时在内存中解压
     console=True,  # CLI 模式，显示控制台窗口
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -334,7 +432,7 @@ coll = COLLECT(
     a.zipfiles,
     a.datas,
     strip=False,
-    upx=True,
+    upx=False,  # Python/Qt 动态库经 UPX 压缩后每次启动都要解压
     upx_exclude=[],
     name='{APP_NAME}-cli',
 )
@@ -347,6 +445,36 @@ coll = COLLECT(
     print(f"[OK] 创建 CLI spec 文件: {APP_NAME}-cli.spec")
 
 
+def package_cli_executable(platform_name, dist_path='dist'):
+    """打包 CLI 版本可执行文件"""
+    dist_dir = Path(dist_path)
+    output_dir = Path('release')
+    output_dir.mkdir(exist_ok=True)
+
+    exe_name = f'{APP_NAME}-cli' if platform_name != "windows" else f'{APP_NAME}-cli.exe'
+    exe_path = dist_dir / f'{APP_NAME}-cli' / exe_name
+
+    # 打包整个 onedir 目录，而不是只复制可执行文件
+    if exe_path.exists():
+        if platform_name == "windows":
+            output_file = shutil.make_archive(
+                str(output_dir / f'{APP_NAME}-cli-{VERSION}-{platform_name}'),
+                'zip',
+                root_dir=dist_dir,
+                base_dir=f'{APP_NAME}-cli'
+            )
+        else:
+            os.chmod(exe_path, 0o755)
+            output_file = output_dir / f'{APP_NAME}-cli-{VERSION}-{platform_name}.tar.gz'
+            tar_gz_directory(dist_dir / f'{APP_NAME}-cli', output_file)
+
+        print(f"[OK] 输出文件: {output_file}")
+        return True
+
+    print(f"[FAIL] 未找到 CLI 编译输出文件")
+    return False
+
+
 def build_all():
     """编译所有平台版本"""
     print(f"\n{'='*60}")
@@ -381,72 +509,29 @@ def build_all():
             package_executable(current_platform)
 
     elif choice == "2":
-        # 创建 CLI spec 文件
-        create_cli_spec()
-
         # 编译 CLI 版本
-        cmd = [
-            'pyinstaller',
-            '--clean',
-            f'{APP_NAME}-cli.spec',
-            '--noconfirm',
-        ]
-
-        print("执行命令:")
-        print(" ".join(cmd))
-
-        try:
-            subprocess.run(cmd, check=True)
-            print(f"\n[OK] CLI 版本编译成功!")
-
-            # 打包
-            dist_dir = Path('dist')
-            output_dir = Path('release')
-            output_dir.mkdir(exist_ok=True)
-
-            exe_name = APP_NAME if current_platform != "windows" else f'{APP_NAME}-cli.exe'
-            exe_path = dist_dir / f'{APP_NAME}-cli' / exe_name
-
-            if exe_path.exists():
-                if current_platform == "windows":
-                    output_file = output_dir / f'{APP_NAME}-cli-{VERSION}-{current_platform}.exe'
-                    shutil.copy(exe_path, output_file)
-                else:
-                    os.chmod(exe_path, 0o755)
-                    import tarfile
-                    output_file = output_dir / f'{APP_NAME}-cli-{VERSION}-{current_platform}.tar.gz'
-                    with tarfile.open(output_file, 'w:gz') as tar:
-                        tar.add(exe_path, arcname=f'{APP_NAME}-cli')
-
-                print(f"[OK] 输出文件: {output_file}")
-                success = True
-
-        except subprocess.CalledProcessError as e:
-            print(f"\n[FAIL] 编译失败: {e}")
+        if build_cli_executable():
+            success = package_cli_executable(current_platform)
 
     elif choice == "3":
-        # 编译 GUI 版本
-        gui_success = build_executable(current_platform)
-        if gui_success:
-            package_executable(current_platform)
-
-        # 编译 CLI 版本
-        create_cli_spec()
-
-        cmd = [
-            'pyinstaller',
-            '--clean',
-            f'{APP_NAME}-cli.spec',
-            '--noconfirm',
-        ]
+        # GUI 和 CLI 两次 PyInstaller 分析互不依赖，并行编译；
+        # 使用各自独立的 dist/build 目录，避免共享目录相互覆盖。
+        # --clean 会清空 PyInstaller 的用户级缓存目录，并行时各用一个缓存目录，避免删除对方正在使用的缓存
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            gui_future = executor.submit(
+                build_executable, current_platform, 'dist_gui', 'build_gui', 'pyinstaller_cache_gui'
+            )
+            cli_future = executor.submit(build_cli_executable, 'dist_cli', 'build_cli', 'pyinstaller_cache_cli')
+            gui_success = gui_future.result()
+            cli_success = cli_future.result()
 
-        try:
-            subprocess.run(cmd, check=True)
-            print(f"\n[OK] CLI 版本编译成功!")
-        except subprocess.CalledProcessError as e:
-            print(f"\n[FAIL] CLI 版本编译失败: {e}")
+        if gui_success:
+            gui_success = package_executable(current_platform, 'dist_gui')
+        if cli_success:
+            cli_success = package_cli_executable(current_platform, 'dist_cli')
 
-        success = gui_success
+        # 任一版本编译或打包失败都视为失败
+        success = gui_success and cli_success
 
     else:
         print("无效的选项")
@@ -482,9 +567,15 @@ def main():
     parser.add_argument('--gui', action='store_true', help='仅编译 GUI 版本')
     parser.add_argument('--cli', action='store_true', help='仅编译 CLI 版本')
     parser.add_argument('--no-input', action='store_true', help='非交互模式')
+    parser.add_argument('--onefile', action='store_true', help='（不支持）单文件模式')
 
     args = parser.parse_args()
 
+    # 只支持 onedir 模式：onefile 每次启动都要解压到临时目录，冷启动慢
+    if args.onefile:
+        print("[FAIL] 不支持 --onefile 模式，请使用默认的 onedir 模式编译")
+        return 1
+
     if args.no_input:
         # 非交互模式，默认编译 GUI 版本
         current_platform = get_platform()
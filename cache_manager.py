@@ -5,23 +5,74 @@
 """
 import os
 import sqlite3
-import hashlib
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, List, Tuple
-from datetime import datetime
 from logger import get_logger
 
 # 导入自定义异常
 from exceptions import CacheError, ValidationError
 
+__all__ = ['HashCache']
+
 logger = get_logger()
 
+# 数据库页大小（默认 4KB，8KB 可减少大表的 B 树层数）
+CACHE_PAGE_SIZE = 8192
+
+# 旧版本 SQLite（< 3.32）单条语句最多绑定 999 个参数
+SQLITE_MAX_VARIABLES = 999
+
+# 超过该数量时 get_batch 改用临时表 JOIN（每个文件占用 path/size/mtime 三个参数，另有一个算法参数）
+BATCH_TEMP_TABLE_THRESHOLD = (SQLITE_MAX_VARIABLES - 1) // 3
+
+# 旧版本缓存没有 algorithm 列，其中的哈希均由默认算法计算
+DEFAULT_ALGORITHM = 'sha256'
+
+# set_batch 每个事务写入的最大行数，避免超大事务导致 WAL 检查点停顿
+SET_BATCH_CHUNK_SIZE = 50000
+
+# 旧版本创建、现已被覆盖索引取代的索引
+OBSOLETE_INDEXES = ('idx_path', 'idx_size_mtime', 'idx_path_size_mtime')
+
+# 清理无效缓存时并行检查文件是否存在的线程数
+CLEANUP_EXISTS_WORKERS = 32
+
+# get() 的单条查询
+GET_SQL = "SELECT hash_value FROM hash_cache WHERE path = ? AND size = ? AND mtime = ? AND algorithm = ?"
+
+# 使用 UPSERT 原地更新已存在的行（INSERT OR REPLACE 会先删除再插入，重写所有索引项）
+# updated_at 由 SQLite 的 CURRENT_TIMESTAMP 生成，无需在 Python 中逐行格式化时间
+UPSERT_SQL = """
+    INSERT INTO hash_cache (path, size, mtime, hash_value, algorithm)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(path) DO UPDATE SET
+        size = excluded.size,
+        mtime = excluded.mtime,
+        algorithm = excluded.algorithm,
+        hash_value = excluded.hash_value,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def _prefix_range(prefix: str) -> Tuple[str, str]:
+    """
+    将目录前缀转换为 [lower, upper) 范围
+
+    lower 为规范化后以分隔符结尾的前缀，upper 为将其最后一个字符加一，
+    所有以 lower 开头的路径都落在该范围内。
+    """
+    lower = os.path.normpath(prefix).rstrip(os.sep) + os.sep
+    upper = lower[:-1] + chr(ord(lower[-1]) + 1)
+    return lower, upper
+
 
 class HashCache:
     """文件哈希缓存管理器"""
 
-    def __init__(self, cache_path: str = "hash_cache.db"):
+    def __init__(self, cache_path: str = "hash_cache.db", algorithm: str = DEFAULT_ALGORITHM):
         self.cache_path = cache_path
+        # 只读写该算法计算的哈希，切换算法后旧结果自动失效
+        self.algorithm = algorithm
         self.conn = None
         self._init_db()
 
@@ -29,28 +80,74 @@ class HashCache:
         """初始化数据库"""
         try:
             self.conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+            # 页大小必须在建表前设置；旧数据库需 VACUUM 一次才能生效
+            self._apply_page_size()
             # 使用WAL模式提高并发性能
             self.conn.execute("PRAGMA journal_mode=WAL")
             # 优化性能
             self.conn.execute("PRAGMA synchronous=NORMAL")
             self.conn.execute("PRAGMA cache_size=-64000")  # 64MB cache
+            self.conn.execute("PRAGMA mmap_size=268435456")  # 256MB 内存映射，全表扫描免 read() 系统调用
+            self.conn.execute("PRAGMA temp_store=MEMORY")
+            self.conn.execute("PRAGMA wal_autocheckpoint=10000")
             self.conn.execute("""
                 CREATE TABLE IF NOT EXISTS hash_cache (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id INTEGER PRIMARY KEY,
                     path TEXT UNIQUE NOT NULL,
                     size INTEGER NOT NULL,
                     mtime REAL NOT NULL,
                     hash_value TEXT NOT NULL,
+                    algorithm TEXT NOT NULL DEFAULT 'sha256',
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
-            # 创建索引以提高查询性能
-            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_path ON hash_cache(path)")
-            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_size_mtime ON hash_cache(size, mtime)")
+            self._migrate_algorithm_column()
+            # 所有查询都以 path 开头，由下面的覆盖索引服务；path 的 UNIQUE 约束另有自动索引。
+            # 旧版本的单列 path 索引与 (size, mtime) 索引从不被查询使用，只会让每次写入多维护两棵 B 树
+            for obsolete_index in OBSOLETE_INDEXES:
+                self.conn.execute(f"DROP INDEX IF EXISTS {obsolete_index}")
+            # 覆盖索引：批量查询时只需读取索引即可得到哈希值
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_path_size_mtime_algorithm "
+                "ON hash_cache(path, size, mtime, algorithm, hash_value)"
+            )
             self.conn.commit()
         except sqlite3.Error as e:
-            raise CacheError(f"数据库初始化失败: {e}", db_path=cache_path)
+            raise CacheError(f"数据库初始化失败: {e}", db_path=self.cache_path)
+
+    def _migrate_algorithm_column(self):
+        """为旧数据库添加 algorithm 列（已有记录均为默认算法计算）"""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(hash_cache)")}
+        if 'algorithm' not in columns:
+            self.conn.execute(
+                f"ALTER TABLE hash_cache ADD COLUMN algorithm TEXT NOT NULL DEFAULT '{DEFAULT_ALGORITHM}'"
+            )
+
+    def _apply_page_size(self):
+        """将数据库页大小设置为 CACHE_PAGE_SIZE（旧数据库只迁移一次）"""
+        current = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        if current == CACHE_PAGE_SIZE:
+            return
+
+        self.conn.execute(f"PRAGMA page_size={CACHE_PAGE_SIZE}")
+        table_exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='hash_cache'"
+        ).fetchone()
+        if table_exists:
+            # WAL 模式下无法修改页大小，需先切回 DELETE 模式再 VACUUM。
+            # 这只是性能调优：数据库被其他连接（如同时运行的 GUI 和 CLI）占用时跳过，
+            # 页大小保持不变，下次打开时再尝试，不能因此让缓存初始化失败
+            try:
+                self.conn.execute("PRAGMA journal_mode=DELETE")
+                self.conn.execute("VACUUM")
+                logger.info(f"缓存数据库页大小已从 {current} 迁移为 {CACHE_PAGE_SIZE}")
+            except sqlite3.OperationalError as e:
+                logger.warning(f"缓存数据库页大小迁移失败，下次打开时重试: {e}")
+                try:
+                    self.conn.execute("PRAGMA journal_mode=WAL")
+                except sqlite3.OperationalError:
+                    pass  # 仍被占用时由 _init_db 随后再次设置
 
     def get(self, file_path: str, size: int, mtime: float) -> Optional[str]:
         """
@@ -64,12 +161,8 @@ class HashCache:
         Returns:
             缓存的哈希值，如果缓存无效则返回 None
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT hash_value FROM hash_cache
-            WHERE path = ? AND size = ? AND mtime = ?
-        """, (file_path, size, mtime))
-        result = cursor.fetchone()
+        # 固定的 SQL 文本可命中 sqlite3 的预编译语句缓存
+        result = self.conn.execute(GET_SQL, (file_path, size, mtime, self.algorithm)).fetchone()
         return result[0] if result else None
 
     def get_batch(self, file_infos: List[Tuple[str, int, float]]) -> Dict[str, str]:
@@ -85,16 +178,20 @@ class HashCache:
         if not file_infos:
             return {}
 
-        # 使用IN语句批量查询
+        if len(file_infos) > BATCH_TEMP_TABLE_THRESHOLD:
+            return self._get_batch_via_temp_table(file_infos)
+
+        # 少量文件使用IN语句批量查询
         placeholders = ','.join(['(?,?,?)'] * len(file_infos))
         query = f"""
             SELECT path, hash_value
             FROM hash_cache
-            WHERE (path, size, mtime) IN ({placeholders})
+            WHERE algorithm = ? AND (path, size, mtime) IN ({placeholders})
         """
 
         # 扁平化参数
-        params = [item for tup in file_infos for item in tup]
+        params = [self.algorithm]
+        params.extend(item for tup in file_infos for item in tup)
 
         try:
             cursor = self.conn.cursor()
@@ -106,6 +203,60 @@ class HashCache:
             logger.error(f"批量查询缓存失败: {e}")
             return {}
 
+    def _get_batch_via_temp_table(self, file_infos: List[Tuple[str, int, float]]) -> Dict[str, str]:
+        """大批量查询：先写入临时表，再与缓存表 JOIN"""
+        try:
+            with self.conn:
+                self.conn.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS cache_probe (
+                        path TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        mtime REAL NOT NULL
+                    )
+                """)
+                self.conn.executemany("INSERT INTO cache_probe VALUES (?, ?, ?)", file_infos)
+                results = self.conn.execute("""
+                    SELECT h.path, h.hash_value
+                    FROM cache_probe p
+                    JOIN hash_cache h
+                      ON h.path = p.path AND h.size = p.size AND h.mtime = p.mtime
+                    WHERE h.algorithm = ?
+                """, (self.algorithm,)).fetchall()
+                self.conn.execute("DELETE FROM cache_probe")
+
+            return {path: hash_value for path, hash_value in results}
+        except sqlite3.Error as e:
+            logger.error(f"批量查询缓存失败: {e}")
+            return {}
+
+    def load_all(self, prefix: Optional[str] = None) -> Dict[Tuple[str, int, float], str]:
+        """
+        一次性加载缓存到内存（用于单次扫描期间的快速查找）
+
+        Args:
+            prefix: 路径前缀，只加载该目录下的缓存；为 None 时加载全部
+
+        Returns:
+            {(path, size, mtime): hash_value} 字典
+        """
+        try:
+            if prefix:
+                # 使用范围查询代替 LIKE/GLOB，可以走 path 索引
+                rows = self.conn.execute("""
+                    SELECT path, size, mtime, hash_value FROM hash_cache
+                    WHERE path >= ? AND path < ? AND algorithm = ?
+                """, (*_prefix_range(prefix), self.algorithm)).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT path, size, mtime, hash_value FROM hash_cache WHERE algorithm = ?",
+                    (self.algorithm,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"加载缓存失败: {e}")
+            return {}
+
+        return {(path, size, mtime): hash_value for path, size, mtime, hash_value in rows}
+
     def set(self, file_path: str, size: int, mtime: float, hash_value: str):
         """
         设置文件哈希缓存
@@ -116,12 +267,7 @@ class HashCache:
             mtime: 文件修改时间
             hash_value: 哈希值
         """
-        cursor = self.conn.cursor()
-        now = datetime.now().isoformat()
-        cursor.execute("""
-            INSERT OR REPLACE INTO hash_cache (path, size, mtime, hash_value, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, (file_path, size, mtime, hash_value, now))
+        self.conn.execute(UPSERT_SQL, (file_path, size, mtime, hash_value, self.algorithm))
         self.conn.commit()
 
     def set_batch(self, entries: List[Dict]):
@@ -134,18 +280,15 @@ class HashCache:
         if not entries:
             return
 
-        cursor = self.conn.cursor()
-        now = datetime.now().isoformat()
-
-        # 使用executemany批量插入
-        cursor.executemany("""
-            INSERT OR REPLACE INTO hash_cache (path, size, mtime, hash_value, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, [
-            (e['path'], e['size'], e['mtime'], e['hash_value'], now)
-            for e in entries
-        ])
-        self.conn.commit()
+        # 使用executemany批量插入，按窗口分块提交（出错时回滚当前块），
+        # 参数用生成器惰性产生，避免一次性构建全部元组
+        for start in range(0, len(entries), SET_BATCH_CHUNK_SIZE):
+            chunk = entries[start:start + SET_BATCH_CHUNK_SIZE]
+            with self.conn:
+                self.conn.executemany(UPSERT_SQL, (
+                    (e['path'], e['size'], e['mtime'], e['hash_value'], self.algorithm)
+                    for e in chunk
+                ))
 
     def invalidate(self, file_path: str):
         """
@@ -154,8 +297,7 @@ class HashCache:
         Args:
             file_path: 文件路径
         """
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM hash_cache WHERE path = ?", (file_path,))
+        self.conn.execute("DELETE FROM hash_cache WHERE path = ?", (file_path,))
         self.conn.commit()
 
     def invalidate_by_prefix(self, prefix: str) -> int:
@@ -172,19 +314,19 @@ class HashCache:
         if not isinstance(prefix, str) or not prefix:
             raise ValidationError("prefix必须是非空字符串", field="prefix")
 
-        # 规范化路径
-        prefix = os.path.normpath(prefix)
-
-        # 使用GLOB模式匹配（更安全）
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM hash_cache WHERE path GLOB ?", (f"{prefix}*",))
+        # 规范化路径，并转换为 B 树范围查询（可走 path 索引）
+        # 以分隔符结尾，避免 /foo 误匹配 /foobar
+        lower, upper = _prefix_range(prefix)
+        cursor = self.conn.execute(
+            "DELETE FROM hash_cache WHERE (path >= ? AND path < ?) OR path = ?",
+            (lower, upper, os.path.normpath(prefix))
+        )
         self.conn.commit()
         return cursor.rowcount
 
     def clear(self):
         """清空所有缓存"""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM hash_cache")
+        self.conn.execute("DELETE FROM hash_cache")
         self.conn.commit()
 
     def get_stats(self) -> Dict:
@@ -226,21 +368,25 @@ class HashCache:
         Args:
             valid_paths: 有效路径列表，如果为 None 则检查所有缓存路径
         """
-        cursor = self.conn.cursor()
+        cached_paths = [row[0] for row in self.conn.execute("SELECT path FROM hash_cache")]
 
         if valid_paths is not None:
             valid_set = set(valid_paths)
-            cursor.execute("SELECT path FROM hash_cache")
-            to_delete = [row[0] for row in cursor.fetchall() if row[0] not in valid_set]
+            to_delete = [path for path in cached_paths if path not in valid_set]
         else:
-            # Check if files still exist
-            cursor.execute("SELECT path FROM hash_cache")
-            to_delete = [row[0] for row in cursor.fetchall() if not os.path.exists(row[0])]
-
-        for path in to_delete:
-            cursor.execute("DELETE FROM hash_cache WHERE path = ?", (path,))
+            # Check if files still exist（stat 系统调用会释放 GIL，用线程池并行检查）
+            with ThreadPoolExecutor(max_workers=CLEANUP_EXISTS_WORKERS) as executor:
+                exists = executor.map(os.path.exists, cached_paths, chunksize=256)
+                to_delete = [path for path, ok in zip(cached_paths, exists) if not ok]
+
+        if to_delete:
+            # 在一个事务中批量删除
+            with self.conn:
+                self.conn.executemany(
+                    "DELETE FROM hash_cache WHERE path = ?",
+                    [(path,) for path in to_delete]
+                )
 
-        self.conn.commit()
         return len(to_delete)
 
     def close(self):
@@ -3,11 +3,30 @@
 
 支持加载和保存应用程序配置。
 """
+import atexit
 import json
 import os
+import threading
+import weakref
 from typing import Any, Dict, List
 from pathlib import Path
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+# 尚未销毁的 ConfigManager 实例；退出时统一写入未保存的修改，弱引用不延长实例寿命
+_instances: "weakref.WeakSet[ConfigManager]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all() -> None:
+    for manager in list(_instances):
+        manager.flush()
+
 
 class ConfigManager:
     """配置管理器"""
@@ -52,16 +71,23 @@ class ConfigManager:
         "show_eta": True,
     }
 
+    # set() 触发的保存延迟时间（秒），期间的多次修改合并为一次写入
+    SAVE_DEBOUNCE_SECONDS = 0.3
+
     def __init__(self, config_path: str = "config.json"):
         self.config_path = config_path
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._save_timer = None
         self.config = self._load_config()
+        # 退出时写入尚未保存的修改
+        _instances.add(self)
 
     def _load_config(self) -> Dict[str, Any]:
         """加载配置文件"""
         if os.path.exists(self.config_path):
             try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    user_config = json.load(f)
+                user_config = self._read_json(self.config_path)
                 # 合并用户配置和默认配置
                 config = self.DEFAULT_CONFIG.copy()
                 config.update(user_config)
@@ -77,14 +103,64 @@ class ConfigManager:
     def save_config(self, config: Dict[str, Any] = None) -> bool:
         """保存配置文件"""
         try:
-            config_to_save = config or self.config
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(config_to_save, f, ensure_ascii=False, indent=2)
+            # 写入也在锁内进行：延迟保存的定时器线程与主线程不会同时写同一个临时文件
+            with self._lock:
+                # 本次写入取代尚未执行的延迟保存，否则定时器稍后会用 self.config 覆盖显式传入的配置
+                self._cancel_pending_save()
+                config_to_save = config if config else dict(self.config)
+                self._write_json(self.config_path, config_to_save)
             return True
         except Exception as e:
             print(f"保存配置文件失败: {e}")
             return False
 
+    @staticmethod
+    def _read_json(path: str) -> Dict[str, Any]:
+        """读取 JSON 文件（优先使用 orjson）"""
+        if HAS_ORJSON:
+            return orjson.loads(Path(path).read_bytes())
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_json(path: str, data: Dict[str, Any]) -> None:
+        """写入 JSON 文件（优先使用 orjson，直接输出 UTF-8 字节）
+
+        先写入临时文件再原子替换，避免写入中断导致配置文件损坏。
+        """
+        tmp_path = path + '.tmp'
+        if HAS_ORJSON:
+            Path(tmp_path).write_bytes(
+                orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            )
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def _cancel_pending_save(self) -> None:
+        """取消尚未执行的延迟保存"""
+        self._dirty = False
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+
+    def _schedule_save(self) -> None:
+        """安排一次延迟保存（已有待执行的保存时直接合并）"""
+        with self._lock:
+            self._dirty = True
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self.SAVE_DEBOUNCE_SECONDS, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def flush(self) -> bool:
+        """立即写入尚未保存的修改"""
+        with self._lock:
+            if not self._dirty:
+                return True
+        return self.save_config()
+
     def save(self) -> bool:
         """保存配置（便捷方法）"""
         return self.save_config()
@@ -94,10 +170,11 @@ class ConfigManager:
         return self.config.get(key, default)
 
     def set(self, key: str, value: Any, save: bool = True) -> None:
-        """设置配置项"""
-        self.config[key] = value
+        """设置配置项（save=True 时延迟合并写入，调用 flush() 可立即写入）"""
+        with self._lock:
+            self.config[key] = value
         if save:
-            self.save_config()
+            self._schedule_save()
 
     def get_all(self) -> Dict[str, Any]:
         """获取所有配置"""
@@ -105,8 +182,9 @@ class ConfigManager:
 
     def reset_to_default(self) -> None:
         """重置为默认配置"""
-        self.config = self.DEFAULT_CONFIG.copy()
-        self.save_config()
+        with self._lock:
+            self.config = self.DEFAULT_CONFIG.copy()
+            self.save_config()
 
     @staticmethod
     def get_config_path() -> str:
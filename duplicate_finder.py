@@ -1,13 +1,45 @@
-from typing import Dict, List, Set, Callable, Optional, Tuple
-from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Set, Callable, Optional, Tuple
+from contextlib import ExitStack
+from itertools import repeat
+from operator import itemgetter
 from dataclasses import dataclass
 import os
+import sys
+import errno
+import mmap
+import zlib
 import logging
-
-from file_scanner import FileInfo, FileScanner, HashCalculator, PermissionErrorInfo
+import random
+import threading
+import gc
+import queue
+from importlib.util import find_spec
+from pathlib import Path
+
+from file_scanner import (
+    FileInfo, FileScanner, HashCalculator, PermissionErrorInfo, ProgressReporter, MMAP_MIN_SIZE,
+    advise_sequential_read, advise_will_need, map_file_readonly, new_hasher, release_page_cache,
+)
 from cache_manager import HashCache
 from exceptions import FileScanError, HashCalculationError as HashCalcError
 import multiprocessing as mp
+import struct
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+# xxHash 为可选依赖：部分哈希只用于分组筛选，重复结论仍由完整哈希确认，不需要抗碰撞
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+# NumPy 为可选依赖（安装 OpenCV 时会一并安装），只在文件数量很大时按需导入
+HAS_NUMPY = find_spec('numpy') is not None
 
 # 导入并发执行模块
 try:
@@ -20,8 +52,268 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 # 配置常量
-HASH_CHUNK_SIZE = 32 * 1024  # 32KB chunks
+PARTIAL_HASH_SAMPLE_SIZE = 1024 * 1024  # 部分哈希每个采样窗口 1MB
+SMALL_FILE_FULL_HASH_SIZE = 64 * 1024  # 不超过该大小的文件跳过预筛选，一次读取直接计算完整哈希
+PAIR_VERIFY_SAMPLE_SIZE = 4 * 1024  # 信任部分哈希时随机抽样比较的字节数
+MULTI_STAGE_MIN_FILE_SIZE = 5 * 1024 * 1024  # 超过 5MB 视为大文件
+MULTI_STAGE_MIN_LARGE_FILES = 10  # 至少有这么多大文件时才使用多阶段哈希
+INCREMENTAL_CHUNK_SIZE = 4 * 1024 * 1024  # 增量分组哈希每轮读取的块大小
+INCREMENTAL_MAX_GROUP_FILES = 8  # 增量分组哈希每组同时打开的文件数上限，更大的组逐个计算完整哈希
+PREFETCH_DEPTH_PER_WORKER = 2  # 完整哈希时每个线程提前预读的文件数
+PREFETCH_SIZE = 4 * 1024 * 1024  # 每个文件提前预读的字节数
+NUMPY_SIZE_GROUP_THRESHOLD = 200000  # 文件数超过该值时用 NumPy 排序分组
 PROGRESS_BATCH_SIZE_DIVISOR = 4  # 用于计算批处理大小
+HDD_IO_WORKERS = 2  # 机械硬盘的 I/O 线程数
+SSD_MAX_IO_WORKERS = 32  # SSD/NVMe 的 I/O 线程数上限
+
+# Linux FIEMAP ioctl：struct fiemap 头部 32 字节，每个 struct fiemap_extent 56 字节
+FS_IOC_FIEMAP = 0xC020660B
+FIEMAP_HEADER_FORMAT = '=QQLLLL'
+FIEMAP_EXTENT_SIZE = 56
+FIEMAP_MAX_OFFSET = 0xFFFFFFFFFFFFFFFF
+
+
+def _detect_io_workers(path: str) -> Optional[int]:
+    """根据路径所在存储设备的类型估算 I/O 线程数，无法判断时返回 None"""
+    try:
+        st_dev = os.stat(path).st_dev
+    except OSError:
+        return None
+    return _detect_device_workers(st_dev)
+
+
+def _detect_device_workers(st_dev: int) -> Optional[int]:
+    """
+    根据存储设备的类型估算 I/O 线程数（仅 Linux）
+
+    机械硬盘并发读取会导致大量寻道，只使用少量线程；
+    SSD/NVMe 需要较深的队列才能跑满带宽。无法判断时返回 None。
+    """
+    rotational = _is_rotational(st_dev)
+    if rotational is None:
+        return None
+    if rotational:
+        return HDD_IO_WORKERS
+    return min(SSD_MAX_IO_WORKERS, 4 * (os.cpu_count() or 4))
+
+
+def _is_rotational(st_dev: int) -> Optional[bool]:
+    """判断设备是否为机械硬盘（读取 /sys/.../queue/rotational，仅 Linux），无法判断时返回 None"""
+    try:
+        sys_path = os.path.realpath(f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}")
+    except (OSError, AttributeError):
+        return None
+
+    # 分区没有 queue 目录，需要查看其所属的整块磁盘
+    for device_dir in (sys_path, os.path.dirname(sys_path)):
+        rotational_file = os.path.join(device_dir, 'queue', 'rotational')
+        try:
+            with open(rotational_file) as f:
+                return f.read().strip() == '1'
+        except OSError:
+            continue
+
+    return None
+
+
+def _is_rotational_path(path: str) -> bool:
+    """路径所在设备是否为机械硬盘，无法判断时按非机械硬盘处理"""
+    try:
+        return bool(_is_rotational(os.stat(path).st_dev))
+    except OSError:
+        return False
+
+
+def _physical_offset(fd: int) -> Optional[int]:
+    """通过 FIEMAP 获取文件第一个 extent 的物理偏移（仅 Linux，失败返回 None）"""
+    if not HAS_FCNTL or not sys.platform.startswith('linux'):
+        return None
+    request = struct.pack(FIEMAP_HEADER_FORMAT, 0, FIEMAP_MAX_OFFSET, 0, 0, 1, 0)
+    buf = bytearray(request + bytes(FIEMAP_EXTENT_SIZE))
+    try:
+        fcntl.ioctl(fd, FS_IOC_FIEMAP, buf)
+    except OSError:
+        return None
+    mapped_extents = struct.unpack_from('=L', buf, 20)[0]
+    if not mapped_extents:
+        return None
+    # fiemap_extent: fe_logical(u64), fe_physical(u64), ...
+    return struct.unpack_from('=Q', buf, struct.calcsize(FIEMAP_HEADER_FORMAT) + 8)[0]
+
+
+def _sort_by_physical(files: List[FileInfo]) -> List[FileInfo]:
+    """
+    按磁盘上的物理位置排序文件，使哈希读取尽量顺序进行
+
+    排序键为 (st_dev, 第一个 extent 的物理偏移)；无法获取物理偏移时
+    退回使用 inode 号作为近似（同一目录下创建的文件 inode 通常相邻）。
+    机械硬盘上可显著减少寻道。每个文件要多一次 open 和 ioctl，SSD/NVMe 和网络文件系统上
+    得不偿失，调用方只在 self._rotational 为真时使用。
+    """
+    def disk_order_key(file_info: FileInfo) -> Tuple[int, int]:
+        try:
+            fd = os.open(file_info.path, os.O_RDONLY)
+        except OSError:
+            return (-1, 0)
+        try:
+            physical = _physical_offset(fd)
+        finally:
+            os.close(fd)
+        # 设备号和 inode 在扫描时已随 stat 取得，无需再 fstat
+        return (file_info.device, physical if physical is not None else file_info.inode)
+
+    return sorted(files, key=disk_order_key)
+
+
+def _group_by_size(files: List[FileInfo]) -> List[List[FileInfo]]:
+    """
+    按文件大小分组，只返回包含 2 个及以上文件的组
+
+    文件数量很大且安装了 NumPy 时，用 argsort 一次排序后按游程切分，
+    避免百万级的字典操作；结果按文件大小升序排列。
+
+    分组时会新建大量列表，每次触发的循环垃圾回收都要遍历全部 FileInfo；
+    这些列表不会形成引用环，因此分组期间暂停 GC。
+    """
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if HAS_NUMPY and len(files) >= NUMPY_SIZE_GROUP_THRESHOLD:
+            import numpy as np
+            sizes = np.fromiter((f.size for f in files), dtype=np.int64, count=len(files))
+            order = np.argsort(sizes, kind='stable')
+            bounds = np.flatnonzero(np.diff(sizes[order])) + 1
+            starts = np.concatenate(([0], bounds))
+            ends = np.concatenate((bounds, [len(files)]))
+            multi = np.flatnonzero(ends - starts > 1)
+            order_list = order.tolist()
+            return [
+                [files[i] for i in order_list[start:end]]
+                for start, end in zip(starts[multi].tolist(), ends[multi].tolist())
+            ]
+
+        size_groups: Dict[int, List[FileInfo]] = {}
+        for file_info in files:
+            size_groups.setdefault(file_info.size, []).append(file_info)
+
+        # Filter out groups with only one file (cannot be duplicates)
+        return [group for group in size_groups.values() if len(group) > 1]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def _collapse_hardlinks(
+    size_groups: List[List[FileInfo]]
+) -> Tuple[List[List[FileInfo]], Dict[str, List[FileInfo]]]:
+    """
+    将每个大小分组内指向同一 inode 的硬链接合并为一个代表文件
+
+    硬链接内容必然相同，只需哈希代表文件。返回 (只含代表文件且仍有 2 个以上文件的分组,
+    {代表文件路径: 该 inode 的全部硬链接（代表文件在首位）})；inode 未知（为 0）的文件各自独立。
+    """
+    groups: List[List[FileInfo]] = []
+    links: Dict[str, List[FileInfo]] = {}
+    for group in size_groups:
+        by_inode: Dict[Any, List[FileInfo]] = {}
+        for file_info in group:
+            key = (file_info.device, file_info.inode) if file_info.inode else file_info.path
+            by_inode.setdefault(key, []).append(file_info)
+        if len(by_inode) == len(group):
+            groups.append(group)
+            continue
+        for members in by_inode.values():
+            if len(members) > 1:
+                links[members[0].path] = members
+        if len(by_inode) > 1:
+            groups.append([members[0] for members in by_inode.values()])
+    return groups, links
+
+
+def _expand_hardlinks(
+    hash_groups: Dict[str, List[FileInfo]],
+    links: Dict[str, List[FileInfo]]
+) -> Dict[str, List[FileInfo]]:
+    """把硬链接放回其代表文件所在的哈希分组；未进入任何分组的硬链接组本身即为重复"""
+    expanded: Dict[str, List[FileInfo]] = {}
+    reported = set()
+    for hash_value, file_list in hash_groups.items():
+        members = []
+        for file_info in file_list:
+            members.append(file_info)
+            if file_info.path in links:
+                members.extend(links[file_info.path][1:])
+                reported.add(file_info.path)
+        expanded[hash_value] = members
+
+    for path, members in links.items():
+        if path not in reported:
+            # 代表文件没有与其他文件同大小，或被预筛选排除，硬链接按 inode 单独成组
+            expanded[f"inode:{members[0].device}:{members[0].inode}"] = members
+    return expanded
+
+
+def _cancel_pending(executor, futures) -> None:
+    """取消执行器中尚未开始的任务（Python 3.9+ 由执行器一次性清空队列）"""
+    if sys.version_info >= (3, 9):
+        executor.shutdown(wait=False, cancel_futures=True)
+    else:
+        for f in futures:
+            f.cancel()
+
+
+class _Prefetcher:
+    """
+    后台线程提前提示内核预读即将哈希的文件
+
+    哈希线程读完一个文件才会打开下一个，设备在两个文件之间处于空闲。消费循环每完成
+    一个文件调用 advance()，预读线程始终领先 depth 个文件，对其开头 PREFETCH_SIZE 字节
+    发出 WILLNEED，让读取与哈希计算重叠。小于 MMAP_MIN_SIZE 的文件不值得额外的 open：
+    它们仍占据列表中的位置（保持与消费进度对齐），只是不发出预读。
+    """
+
+    def __init__(self, files: List[FileInfo], depth: int):
+        self._files = files
+        self._depth = depth
+        self._next = 0
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def advance(self):
+        if self._thread is None or self._next >= len(self._files):
+            return
+        file_info = self._files[self._next]
+        self._next += 1
+        if file_info.size >= MMAP_MIN_SIZE:
+            self._queue.put(file_info.path)
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            if path is None:
+                return
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue  # 交给哈希函数报告错误
+            try:
+                advise_will_need(fd, [(0, PREFETCH_SIZE)])
+            finally:
+                os.close(fd)
+
+    def __enter__(self):
+        if hasattr(os, 'posix_fadvise') and any(f.size >= MMAP_MIN_SIZE for f in self._files):
+            self._thread = threading.Thread(target=self._run, name="hash-prefetch", daemon=True)
+            self._thread.start()
+            for _ in range(self._depth):
+                self.advance()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._thread is not None:
+            self._next = len(self._files)
+            self._queue.put(None)
+            self._thread.join()
 
 
 @dataclass
@@ -31,25 +323,73 @@ class DuplicateGroup:
     total_size: int
 
 
-# 静态函数，用于进程池（可被pickle序列化）
-def _calculate_file_hash_static(file_path: str, algorithm: str) -> Optional[str]:
-    """静态函数：计算文件哈希值（可被pickle序列化用于进程池）"""
-    import hashlib
+# 进程池 worker 内的哈希对象原型: (算法名, 空哈希对象)，由 _init_hash_worker 设置
+_worker_hasher_prototype: Optional[Tuple[str, Any]] = None
+
+
+def _hash_file_into(hasher, file_path: str) -> bool:
+    """
+    将整个文件内容送入 hasher，读取失败时记录日志并返回 False
+
+    直接使用文件描述符：小文件大量存在时，open() 创建的 FileIO/BufferedReader 对象
+    和 readinto 循环比哈希本身更耗时；os.read 按文件大小申请，通常一次系统调用即读完。
+    """
     try:
-        hasher = hashlib.new(algorithm)
-        with open(file_path, 'rb') as f:
+        fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    except OSError as e:
+        logger.debug(f"无法读取文件: {file_path} - {e}")
+        return False
+    try:
+        size = os.fstat(fd).st_size
+        if size >= MMAP_MIN_SIZE:
+            # 大文件：mmap 后整体交给 hashlib，由 C 循环完成哈希
+            with map_file_readonly(fd, size) as mm:
+                hasher.update(mm)
+            release_page_cache(fd, size)
+        else:
+            # 多申请 1 字节：文件未变化时第二次读取立即返回空
             while True:
-                chunk = f.read(HASH_CHUNK_SIZE)
+                chunk = os.read(fd, size + 1)
                 if not chunk:
                     break
                 hasher.update(chunk)
-        return hasher.hexdigest()
-    except (OSError, PermissionError) as e:
+        return True
+    except OSError as e:
         logger.debug(f"无法读取文件: {file_path} - {e}")
-        return None
+        return False
     except Exception as e:
         logger.error(f"哈希计算失败: {file_path} - {e}")
-        return None
+        return False
+    finally:
+        os.close(fd)
+
+
+# 静态函数，用于进程池（可被pickle序列化）
+def _calculate_file_hash_static(file_path: str, algorithm: str) -> Optional[str]:
+    """静态函数：计算文件哈希值（可被pickle序列化用于进程池）"""
+    hasher = new_hasher(algorithm)
+    return hasher.hexdigest() if _hash_file_into(hasher, file_path) else None
+
+
+def _worker_file_digest(file_path: str) -> Optional[bytes]:
+    """
+    进程池任务：用 _init_hash_worker 创建的原型计算文件摘要
+
+    算法在初始化时已传给 worker，每个任务只需序列化路径；返回原始摘要字节，
+    比十六进制字符串少一半 IPC 数据，由主进程转换。
+    """
+    hasher = _worker_hasher_prototype[1].copy()
+    return hasher.digest() if _hash_file_into(hasher, file_path) else None
+
+
+def _init_hash_worker(algorithm: str):
+    """
+    进程池初始化：创建本进程复用的空哈希对象原型
+
+    之后每个文件从原型 copy()，省去 hashlib.new 每次按名称查找算法实现的开销。
+    """
+    global _worker_hasher_prototype
+    _worker_hasher_prototype = (algorithm, new_hasher(algorithm))
 
 
 class DuplicateFinder:
@@ -61,7 +401,8 @@ class DuplicateFinder:
         cache_enabled: bool = True,
         cache_path: str = "hash_cache.db",
         use_multi_stage: bool = True,
-        use_process_pool: bool = False  # 新增：使用进程池而非线程池
+        use_process_pool: bool = False,  # 新增：使用进程池而非线程池
+        trust_partial_hash_for_pair_groups: bool = False  # 两文件部分哈希相同时跳过完整哈希
     ):
         self.scanner = scanner
         self.hash_calculator = hash_calculator
@@ -69,6 +410,7 @@ class DuplicateFinder:
         self.cache_enabled = cache_enabled
         self.use_multi_stage = use_multi_stage
         self.use_process_pool = use_process_pool  # 是否使用进程池
+        self.trust_partial_hash_for_pair_groups = trust_partial_hash_for_pair_groups
 
         # 根据类型选择worker数量
         if self.use_process_pool:
@@ -79,11 +421,19 @@ class DuplicateFinder:
             # I/O密集型：限制worker数量
             self.max_workers = min(8, os.cpu_count() or 4)
             self.executor_class = ThreadPoolExecutor
+        # 每次扫描按存储设备重新决定 max_workers，检测不到时回退到这里的值
+        self._default_workers = self.max_workers
 
         # Initialize cache
-        self.cache = HashCache(cache_path) if cache_enabled else None
+        self.cache = HashCache(cache_path, algorithm=hash_calculator.algorithm) if cache_enabled else None
         self.cache_hits = 0
         self.cache_misses = 0
+        # 本次扫描预加载的缓存快照: {(path, size, mtime): hash_value}
+        self._cached_hashes: Dict[Tuple[str, int, float], str] = {}
+        # 本次扫描中读取失败的文件，后续阶段不再尝试
+        self._unreadable: Set[str] = set()
+        # 扫描目录是否位于机械硬盘上，决定部分哈希前是否按物理位置排序
+        self._rotational = False
 
         # Store all scanned files for similarity detection
         self.all_scanned_files = []
@@ -97,17 +447,25 @@ class DuplicateFinder:
     ) -> List[DuplicateGroup]:
         # Step 1: Scan all files
         files = self.scanner.scan_directory(root_path, scan_progress_callback)
+        self._unreadable = set()
+        self._rotational = _is_rotational_path(root_path)
+
+        # 线程池按存储设备的并发能力决定 worker 数量
+        if not self.use_process_pool:
+            self.max_workers = _detect_io_workers(root_path) or self._default_workers
 
         # Store all scanned files for similarity detection
-        self.all_scanned_files = files.copy()
+        # 扫描结果列表由本次调用独占、FileInfo 不可变，直接保存引用无需复制
+        self.all_scanned_files = files
 
-        # Step 2: Group by size (quick filter)
-        size_groups = defaultdict(list)
-        for file_info in files:
-            size_groups[file_info.size].append(file_info)
+        # 一次性加载扫描目录下的缓存，避免逐个文件查询 SQLite
+        if self.cache:
+            self._cached_hashes = self.cache.load_all(str(Path(root_path)))
 
-        # Filter out groups with only one file (cannot be duplicates)
-        potential_duplicates = [group for group in size_groups.values() if len(group) > 1]
+        # Step 2: Group by size (quick filter)
+        potential_duplicates = _group_by_size(files)
+        # 同一 inode 的硬链接只哈希一次
+        potential_duplicates, hardlinks = _collapse_hardlinks(potential_duplicates)
 
         if cancel_callback and cancel_callback():
             return []
@@ -120,48 +478,44 @@ class DuplicateFinder:
                 hash_progress_callback,
                 cancel_callback
             )
-        elif self.use_parallel and len(potential_duplicates) > 1:
-            hash_groups = self._calculate_hashes_parallel(
-                potential_duplicates,
-                hash_progress_callback,
-                cancel_callback
-            )
         else:
-            hash_groups = self._calculate_hashes_serial(
+            hash_groups = self._calculate_hashes(
                 potential_duplicates,
                 hash_progress_callback,
                 cancel_callback
             )
 
-        # Step 4: Create duplicate groups
-        duplicate_groups = []
-        for hash_value, file_list in hash_groups.items():
-            if len(file_list) > 1:
-                duplicate_groups.append(DuplicateGroup(
-                    hash_value=hash_value,
-                    files=file_list,
-                    total_size=file_list[0].size * len(file_list)
-                ))
+        if cancel_callback and cancel_callback():
+            return []
+        if hardlinks:
+            hash_groups = _expand_hardlinks(hash_groups, hardlinks)
 
-        # Sort by total size (largest duplicates first)
-        duplicate_groups.sort(key=lambda x: x.total_size, reverse=True)
+        # Step 4: Create duplicate groups
+        # 每组总大小只计算一次，先按纯元组排序再构建对象（largest duplicates first）
+        candidates = [
+            (file_list[0].size * len(file_list), hash_value, file_list)
+            for hash_value, file_list in hash_groups.items()
+            if len(file_list) > 1
+        ]
+        candidates.sort(key=itemgetter(0), reverse=True)
+
+        duplicate_groups = [
+            DuplicateGroup(hash_value=hash_value, files=file_list, total_size=total_size)
+            for total_size, hash_value, file_list in candidates
+        ]
 
         return duplicate_groups
 
     def _should_use_multi_stage(self, potential_duplicates: List[List[FileInfo]]) -> bool:
-        """判断是否应该使用多阶段哈希策略"""
-        # Count files larger than 5MB
+        """判断是否应该使用多阶段哈希策略（存在足够多的大文件时）"""
+        # 同组文件大小相同，只需查看每组第一个文件，找到足够多的大文件即可返回
         large_file_count = 0
-        total_files = 0
-
         for group in potential_duplicates:
-            for file_info in group:
-                total_files += 1
-                if file_info.size > 5 * 1024 * 1024:  # 5MB
-                    large_file_count += 1
-
-        # Use multi-stage if there are at least 10 large files
-        return large_file_count >= 10
+            if group[0].size > MULTI_STAGE_MIN_FILE_SIZE:
+                large_file_count += len(group)
+                if large_file_count >= MULTI_STAGE_MIN_LARGE_FILES:
+                    return True
+        return False
 
     def _calculate_hashes_multi_stage(
         self,
@@ -169,295 +523,569 @@ class DuplicateFinder:
         hash_progress_callback: Optional[Callable[[int, int], None]],
         cancel_callback: Optional[Callable[[], bool]]
     ) -> Dict[str, List[FileInfo]]:
-        """多阶段哈希计算：先计算部分哈希快速筛选，再计算完整哈希确认"""
-        # Flatten all files to process
-        all_files = []
-        for group in potential_duplicates:
-            all_files.extend(group)
-
-        total = len(all_files)
-        processed = 0
+        """多阶段哈希计算：先用文件头和部分哈希快速筛选，再计算完整哈希确认"""
+        total = sum(len(group) for group in potential_duplicates)
 
         # Report initial progress
         if hash_progress_callback and total > 0:
             hash_progress_callback(0, total)
 
-        # Calculate report interval
-        report_interval = max(1, total // 40) if total > 40 else 1  # More frequent updates for multi-stage
-        last_reported = 0
-
-        # Stage 1: Calculate partial hashes (first + middle + last 1MB)
-        partial_hash_groups = defaultdict(list)
-        files_for_full_hash = []
+        # 开始读取之前先用缓存快照一次性划分所有文件：命中的直接按完整哈希分组，
+        # 与命中文件同大小的其余文件可能是其重复项，必须计算完整哈希，跳过文件头和部分哈希。
+        # 小文件的开销在于打开而非读取，逐阶段筛选要打开三次，直接计算完整哈希只需一次（结果还会写入缓存）
+        final_hash_groups: Dict[str, List[FileInfo]] = {}
+        second_stage_files = []
+        uncached_groups = []
+        for group in potential_duplicates:
+            uncached = group
+            if self.cache:
+                uncached = []
+                for file_info in group:
+                    cached_hash = self._get_cached_hash(file_info)
+                    if cached_hash:
+                        final_hash_groups.setdefault(cached_hash, []).append(file_info)
+                    else:
+                        uncached.append(file_info)
+                self.cache_hits += len(group) - len(uncached)
+                self.cache_misses += len(uncached)
+            if len(uncached) < len(group) or group[0].size <= SMALL_FILE_FULL_HASH_SIZE:
+                second_stage_files.extend(uncached)
+            elif len(uncached) > 1:
+                uncached_groups.append(uncached)
+
+        # Stage 0: 只读取文件头尾各 4KB，同大小且头尾相同的文件才进入部分哈希阶段。
+        # 每个文件只有两次小读取，延迟主要在打开和寻址上，与部分哈希一样交给线程池并行：
+        # pread 释放 GIL，每个 worker 各有一个未完成的读请求，设备队列深度即 worker 数
+        # （SSD/NVMe 上最多 SSD_MAX_IO_WORKERS），无需 io_uring 这类批量提交接口
+        head_groups: Dict[Tuple[int, int], List[FileInfo]] = {}
+        for file_info, head_hash in self._hash_pipeline(
+            [file_info for group in uncached_groups for file_info in group],
+            self._calculate_head_hash, (0, 0), total, None, cancel_callback
+        ):
+            if head_hash is not None:
+                head_groups.setdefault((file_info.size, head_hash), []).append(file_info)
+        if cancel_callback and cancel_callback():
+            return {}
+        all_files = [
+            file_info for head_group in head_groups.values() if len(head_group) > 1
+            for file_info in head_group
+        ]
 
-        for file_info in all_files:
-            if cancel_callback and cancel_callback():
-                return {}
+        # 被文件头过滤掉、缓存命中及直接进入完整哈希的文件计入已处理；前半段进度属于部分哈希
+        stage1_window = ((total - len(all_files)) // 2, total // 2)
 
-            # Try cache first
-            full_hash = None
-            if self.cache:
-                full_hash = self.cache.get(file_info.path, file_info.size, file_info.mtime)
-                if full_hash:
-                    self.cache_hits += 1
-                    # If we have full hash in cache, use it directly
-                    hash_groups = defaultdict(list)
-                    hash_groups[full_hash].append(file_info)
-                    return hash_groups
-                else:
-                    self.cache_misses += 1
+        # 机械硬盘上按物理位置读取，把随机寻道变为近似顺序访问；
+        # SSD 上寻道代价可忽略，省去逐个文件的 open/FIEMAP 开销。只改变遍历顺序，不影响分组
+        if self._rotational:
+            all_files = _sort_by_physical(all_files)
 
-            # Calculate partial hash
-            partial_hash = self._calculate_partial_hash(file_info.path, file_info.size)
+        # Stage 1: Calculate partial hashes (first + middle + last 1MB)
+        files_for_full_hash = []
+        for file_info, partial_hash in self._hash_pipeline(
+            all_files, self._partial_hash_of, stage1_window, total,
+            hash_progress_callback, cancel_callback
+        ):
             if partial_hash:
-                partial_hash_groups[partial_hash].append(file_info)
-                # Track files that need full hash calculation
                 files_for_full_hash.append((file_info, partial_hash))
-
-            processed += 1
-            if hash_progress_callback and (processed - last_reported >= report_interval):
-                hash_progress_callback(processed // 2, total)  # First half is partial hashing
-                last_reported = processed
+        if cancel_callback and cancel_callback():
+            return {}
 
         # Stage 2: Group by partial hash and only calculate full hash for groups with multiple files
-        final_hash_groups = defaultdict(list)
-        second_stage_files = []
+        incremental_groups = []
+        byte_compare_pairs = []
 
         # Group files by partial hash
-        partial_to_files = defaultdict(list)
+        partial_to_files: Dict[bytes, List[FileInfo]] = {}
         for file_info, partial_hash in files_for_full_hash:
-            partial_to_files[partial_hash].append(file_info)
+            partial_to_files.setdefault(partial_hash, []).append(file_info)
 
         # Only calculate full hash for groups with 2+ files sharing partial hash
         for partial_hash, file_list in partial_to_files.items():
-            if len(file_list) > 1:
+            if len(file_list) == 2 and self._is_trusted_pair(file_list):
+                # 只有两个文件且部分哈希和随机抽样都一致，直接认定为重复
+                final_hash_groups[f"partial:{partial_hash.hex()}"] = file_list
+            elif len(file_list) == 2 and not self.cache:
+                # 不需要写缓存时两个文件直接逐字节比较，不计算哈希，遇到不同立即停止
+                byte_compare_pairs.append((partial_hash, file_list))
+            elif len(file_list) > INCREMENTAL_MAX_GROUP_FILES:
+                # 增量分组要同时打开组内所有文件、每轮缓存各不相同的块，
+                # 文件描述符和内存都随组大小增长；大组改为逐个计算完整哈希
                 second_stage_files.extend(file_list)
+            elif len(file_list) > 1:
+                incremental_groups.append(file_list)
             else:
                 # Single file in partial hash group - not a duplicate
                 pass
 
         # Stage 3: Calculate full hashes only for potential duplicates
-        if self.use_parallel and len(second_stage_files) > 1:
-            final_hash_groups = self._calculate_full_hashes_parallel(
-                second_stage_files,
-                hash_progress_callback,
-                cancel_callback,
-                total,
-                total // 2  # Start from halfway point
-            )
-        else:
-            final_hash_groups = self._calculate_full_hashes_serial(
-                second_stage_files,
-                hash_progress_callback,
-                cancel_callback,
-                total,
-                total // 2
-            )
+        if byte_compare_pairs:
+            if self.use_parallel and len(byte_compare_pairs) > 1:
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    equal_results = list(executor.map(
+                        lambda pair: self._bytewise_equal(*pair[1]), byte_compare_pairs
+                    ))
+            else:
+                equal_results = [self._bytewise_equal(*pair) for _, pair in byte_compare_pairs]
+            for (partial_hash, file_list), equal in zip(byte_compare_pairs, equal_results):
+                if equal:
+                    final_hash_groups[f"bytes:{partial_hash.hex()}"] = file_list
+            if cancel_callback and cancel_callback():
+                return {}
 
-        # Save cache entries
-        if self.cache and final_hash_groups:
-            cache_entries = []
-            for hash_value, file_list in final_hash_groups.items():
-                for file_info in file_list:
-                    cache_entries.append({
-                        'path': file_info.path,
-                        'size': file_info.size,
-                        'mtime': file_info.mtime,
-                        'hash_value': hash_value
-                    })
-            if cache_entries:
-                self.cache.set_batch(cache_entries)
+        # 后半段进度按文件数在增量分组哈希和完整哈希之间分配
+        stage3_files = sum(len(group) for group in incremental_groups) + len(second_stage_files)
+        half = total // 2
+        middle = half + (total - half) * (stage3_files - len(second_stage_files)) // max(1, stage3_files)
+
+        # 组内同步分块读取，文件一旦与组内其他文件不同即停止读取
+        incremental_hash_groups = self._calculate_incremental_hashes(
+            incremental_groups,
+            hash_progress_callback,
+            cancel_callback,
+            (half, middle),
+            total
+        )
+        if cancel_callback and cancel_callback():
+            return {}
+
+        # 可能与缓存命中文件重复的文件无法在组内提前排除，仍需完整哈希
+        if self._rotational:
+            second_stage_files = _sort_by_physical(second_stage_files)
+        full_hash_groups = self._calculate_full_hashes(
+            second_stage_files,
+            hash_progress_callback,
+            cancel_callback,
+            (middle, total),
+            total
+        )
+
+        for hash_groups in (incremental_hash_groups, full_hash_groups):
+            for hash_value, file_list in hash_groups.items():
+                final_hash_groups.setdefault(hash_value, []).extend(file_list)
 
         return final_hash_groups
 
-    def _calculate_partial_hash(self, file_path: str, file_size: int) -> Optional[str]:
-        """计算文件的部分哈希（头部+尾部+中间各1MB）"""
-        try:
-            import hashlib
-            hasher = hashlib.new(self.hash_calculator.algorithm)
+    def _partial_hash_of(self, file_info: FileInfo) -> Optional[bytes]:
+        """阶段1工作函数：计算单个文件的部分哈希"""
+        return self._calculate_partial_hash(file_info.path, file_info.size)
 
-            with open(file_path, 'rb') as f:
-                # Read first 1MB
-                chunk = f.read(1024 * 1024)
-                if chunk:
-                    hasher.update(chunk)
-
-                # If file is larger than 3MB, read middle and last 1MB
-                if file_size > 3 * 1024 * 1024:
-                    # Seek to middle
-                    f.seek(file_size // 2)
-                    chunk = f.read(1024 * 1024)
-                    if chunk:
-                        hasher.update(chunk)
-
-                    # Seek to last 1MB
-                    f.seek(max(0, file_size - 1024 * 1024))
-                    chunk = f.read(1024 * 1024)
-                    if chunk:
-                        hasher.update(chunk)
-
-            return hasher.hexdigest()
-        except Exception:
-            return None
+    def _calculate_full_hash(self, file_info: FileInfo) -> Optional[str]:
+        """计算单个文件的完整哈希"""
+        hash_value = self.hash_calculator.calculate_file_hash(file_info.path, None)
+        if hash_value is None:
+            # HashCalculator 已记录读取错误，这里只记下路径避免重复尝试
+            self._unreadable.add(file_info.path)
+        return hash_value
 
-    def _calculate_full_hashes_serial(
+    def _iter_hash_results(
         self,
         files: List[FileInfo],
-        hash_progress_callback: Optional[Callable[[int, int], None]],
-        cancel_callback: Optional[Callable[[], bool]],
-        total_files: int,
-        start_offset: int
-    ) -> Dict[str, List[FileInfo]]:
-        """串行计算完整哈希值"""
-        hash_groups = defaultdict(list)
+        hasher_fn: Callable[[FileInfo], Any],
+        cancel_callback: Optional[Callable[[], bool]]
+    ) -> Iterator[Tuple[FileInfo, Any]]:
+        """按配置选择进程池、线程池或串行执行 hasher_fn，逐个产出结果，取消时提前结束"""
+        use_parallel = self.use_parallel and len(files) > 1
+        # 只有完整哈希会顺序读完整个文件，值得提前预读；进程池各自并行读取，不需要
+        prefetch = hasher_fn == self._calculate_full_hash
+
+        if use_parallel and self.use_process_pool and hasher_fn == self._calculate_full_hash:
+            # 使用进程池 + 批处理（减少IPC开销）
+            batch_size = max(1, len(files) // (self.max_workers * PROGRESS_BATCH_SIZE_DIVISOR))
+            with self.executor_class(max_workers=self.max_workers, initializer=_init_hash_worker,
+                                     initargs=(self.hash_calculator.algorithm,)) as executor:
+                digests = executor.map(_worker_file_digest, [f.path for f in files], chunksize=batch_size)
+                for file_info, digest in zip(files, digests):
+                    if cancel_callback and cancel_callback():
+                        # map 的结果迭代器不暴露 future，只能通过执行器取消
+                        _cancel_pending(executor, ())
+                        return
+                    yield file_info, digest.hex() if digest is not None else None
+
+        elif use_parallel:
+            prefetch_depth = PREFETCH_DEPTH_PER_WORKER * self.max_workers
+            device_files = self._partition_by_device(files)
+            if len(device_files) == 1:
+                # 只有一个存储设备（最常见）时用 map 按顺序取结果，
+                # 省去逐个 future 的字典和 as_completed 簿记，预读顺序也与之一致
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor, \
+                        _Prefetcher(files if prefetch else [], prefetch_depth) as prefetcher:
+                    results = executor.map(self._guarded_hash, repeat(hasher_fn), files)
+                    for file_info, result in zip(files, results):
+                        if cancel_callback and cancel_callback():
+                            _cancel_pending(executor, ())
+                            return
+                        prefetcher.advance()
+                        yield file_info, result
+                return
+
+            # 每个存储设备一个线程池，慢速设备上的任务不会拖住快速设备
+            with ExitStack() as stack:
+                executors = []
+                future_to_file = {}
+                for st_dev, dev_files in device_files.items():
+                    workers = _detect_device_workers(st_dev) or self.max_workers
+                    executor = stack.enter_context(ThreadPoolExecutor(max_workers=workers))
+                    executors.append(executor)
+                    for file_info in dev_files:
+                        future_to_file[executor.submit(self._guarded_hash, hasher_fn, file_info)] = file_info
+
+                # 线程池按提交顺序取任务，预读顺序与之一致
+                prefetcher = stack.enter_context(_Prefetcher(
+                    list(future_to_file.values()) if prefetch else [], prefetch_depth
+                ))
+                for future in as_completed(future_to_file):
+                    if cancel_callback and cancel_callback():
+                        for executor in executors:
+                            _cancel_pending(executor, future_to_file)
+                        return
+                    prefetcher.advance()
+                    yield future_to_file[future], future.result()
 
-        report_interval = max(1, len(files) // 20) if len(files) > 20 else 1
-        processed = 0
-        last_reported = 0
+        else:
+            # 当前文件由 hasher_fn 自己读取，预读从下一个文件开始：哈希第 k 个文件时只预读第 k+1 个
+            with _Prefetcher(files[1:] if prefetch else [], 1) as prefetcher:
+                for file_info in files:
+                    if cancel_callback and cancel_callback():
+                        return
+                    result = hasher_fn(file_info)
+                    prefetcher.advance()
+                    yield file_info, result
+
+    def _guarded_hash(self, hasher_fn: Callable[[FileInfo], Any], file_info: FileInfo) -> Any:
+        """在线程池中执行 hasher_fn，读取错误时记录并返回 None，不中断其余文件"""
+        try:
+            return hasher_fn(file_info)
+        except OSError as e:
+            logger.debug(f"哈希计算失败 {file_info.path}: {e}")
+            self._unreadable.add(file_info.path)
+            return None
 
+    @staticmethod
+    def _partition_by_device(files: List[FileInfo]) -> Dict[int, List[FileInfo]]:
+        """按所在存储设备（扫描时记录的 st_dev）划分文件，保持各设备内的原有顺序"""
+        device_files: Dict[int, List[FileInfo]] = {}
         for file_info in files:
-            if cancel_callback and cancel_callback():
-                return {}
-
-            hash_value = self.hash_calculator.calculate_file_hash(file_info.path, None)
-            if hash_value:
-                hash_groups[hash_value].append(file_info)
-
-            processed += 1
-            current = start_offset + processed
-            if hash_progress_callback and (processed - last_reported >= report_interval or processed == len(files)):
-                hash_progress_callback(current, total_files)
-                last_reported = processed
-
-        return hash_groups
+            device_files.setdefault(file_info.device, []).append(file_info)
+        return device_files
 
-    def _calculate_full_hashes_parallel(
+    def _hash_pipeline(
         self,
         files: List[FileInfo],
+        hasher_fn: Callable[[FileInfo], Any],
+        progress_window: Tuple[int, int],
+        total_for_progress: int,
         hash_progress_callback: Optional[Callable[[int, int], None]],
         cancel_callback: Optional[Callable[[], bool]],
-        total_files: int,
-        start_offset: int
-    ) -> Dict[str, List[FileInfo]]:
-        """并行计算完整哈希值"""
-        hash_groups = defaultdict(list)
+        cache_results: bool = False
+    ) -> Iterator[Tuple[FileInfo, Any]]:
+        """
+        统一的哈希流水线，逐个产出 (file_info, hasher_fn 的结果)
+
+        负责执行方式选择、取消检查、进度上报和缓存写入。progress_window 为
+        (起点, 终点)，已处理文件数按比例映射到该区间后上报；cache_results 为
+        True 时结果视为完整哈希批量写入缓存，取消时已算出的部分也会写入。
+        """
+        if self._unreadable:
+            files = [f for f in files if f.path not in self._unreadable]
         cache_entries_to_save = []
+        reporter = ProgressReporter(hash_progress_callback, progress_window, len(files), total_for_progress)
 
-        report_interval = max(1, len(files) // 20) if len(files) > 20 else 1
-        processed = 0
-        last_reported = 0
-
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_file = {
-                executor.submit(self.hash_calculator.calculate_file_hash, file_info.path): file_info
-                for file_info in files
-            }
-
-            for future in as_completed(future_to_file):
-                if cancel_callback and cancel_callback():
-                    for f in future_to_file:
-                        f.cancel()
-                    return {}
+        try:
+            with reporter:
+                for file_info, result in self._iter_hash_results(files, hasher_fn, cancel_callback):
+                    if cache_results and result and self.cache:
+                        cache_entries_to_save.append({
+                            'path': file_info.path,
+                            'size': file_info.size,
+                            'mtime': file_info.mtime,
+                            'hash_value': result
+                        })
 
-                file_info = future_to_file[future]
+                    yield file_info, result
+                    reporter.advance()
+        finally:
+            if cache_entries_to_save:
+                self._save_cache_entries(cache_entries_to_save)
+
+    def _is_trusted_pair(self, file_list: List[FileInfo]) -> bool:
+        """
+        判断部分哈希相同的两个文件能否不计算完整哈希直接认定为重复
+
+        仅在启用 trust_partial_hash_for_pair_groups 时生效；额外比较一个随机
+        位置的 4KB 内容，避免头/中/尾采样恰好相同而中间不同的文件被误判。
+        """
+        if not self.trust_partial_hash_for_pair_groups:
+            return False
+        a, b = file_list
+        if a.size != b.size:
+            return False
+        offset = random.randrange(max(1, a.size - PAIR_VERIFY_SAMPLE_SIZE + 1))
+        try:
+            with open(a.path, 'rb') as fa, open(b.path, 'rb') as fb:
+                fa.seek(offset)
+                fb.seek(offset)
+                return fa.read(PAIR_VERIFY_SAMPLE_SIZE) == fb.read(PAIR_VERIFY_SAMPLE_SIZE)
+        except OSError as e:
+            logger.debug(f"抽样比较失败，回退到完整哈希: {a.path}, {b.path} - {e}")
+            return False
+
+    def _bytewise_equal(self, a: FileInfo, b: FileInfo) -> bool:
+        """逐块比较两个文件的内容（bytes 比较即 memcmp），出错时视为不同"""
+        if a.size != b.size:
+            return False
+        try:
+            with open(a.path, 'rb') as fa, open(b.path, 'rb') as fb:
+                advise_sequential_read(fa.fileno())
+                advise_sequential_read(fb.fileno())
                 try:
-                    hash_value = future.result()
-                    if hash_value:
-                        hash_groups[hash_value].append(file_info)
-                        if self.cache:
-                            cache_entries_to_save.append({
-                                'path': file_info.path,
-                                'size': file_info.size,
-                                'mtime': file_info.mtime,
-                                'hash_value': hash_value
-                            })
-
-                    processed += 1
-                    current = start_offset + processed
-                    if hash_progress_callback and (processed - last_reported >= report_interval):
-                        hash_progress_callback(current, total_files)
-                        last_reported = processed
-                except Exception:
-                    processed += 1
-                    pass
-
-        # Save cache entries
-        if cache_entries_to_save and self.cache:
-            self.cache.set_batch(cache_entries_to_save)
+                    while True:
+                        chunk_a = fa.read(INCREMENTAL_CHUNK_SIZE)
+                        if chunk_a != fb.read(INCREMENTAL_CHUNK_SIZE):
+                            return False
+                        if not chunk_a:
+                            return True
+                finally:
+                    release_page_cache(fa.fileno(), a.size)
+                    release_page_cache(fb.fileno(), b.size)
+        except OSError as e:
+            logger.debug(f"逐字节比较失败: {a.path}, {b.path} - {e}")
+            return False
+
+    def _get_cached_hash(self, file_info: FileInfo) -> Optional[str]:
+        """从本次扫描预加载的缓存快照中查找哈希值"""
+        return self._cached_hashes.get((file_info.path, file_info.size, file_info.mtime))
+
+    def _save_cache_entries(self, entries: List[Dict]):
+        """批量写入缓存，并同步更新内存快照"""
+        self.cache.set_batch(entries)
+        for e in entries:
+            self._cached_hashes[(e['path'], e['size'], e['mtime'])] = e['hash_value']
+
+    def _calculate_head_hash(self, file_info: FileInfo) -> Optional[int]:
+        """计算文件头尾（各 4KB）的 CRC32，用于多阶段哈希的快速预筛选"""
+        head_hash = self.hash_calculator.calculate_head_tail_hash(file_info.path, file_info.size)
+        if head_hash is None:
+            self._unreadable.add(file_info.path)
+        return head_hash
+
+    def _calculate_partial_hash(self, file_path: str, file_size: int) -> Optional[bytes]:
+        """
+        计算文件的部分哈希（头部+尾部+中间各1MB）
+
+        部分哈希只在本次扫描内作为分组键，返回原始摘要字节：比十六进制字符串小一半，
+        作为字典键时计算哈希也更快，只在生成分组标签时才转换为十六进制。
+        """
+        try:
+            hasher = xxhash.xxh3_128() if HAS_XXHASH else self.hash_calculator.new_hasher()
+            sample_size = PARTIAL_HASH_SAMPLE_SIZE
 
-        return hash_groups
+            with open(file_path, 'rb') as f:
+                if file_size == 0:
+                    return hasher.digest()
+
+                if file_size < MMAP_MIN_SIZE:
+                    # 小文件只采样一个窗口，一次 read 比建立映射更便宜
+                    hasher.update(f.read(sample_size))
+                    return hasher.digest()
+
+                # mmap 整个文件，只有被切片访问的页面才会读入；
+                # 切片以内存视图形式交给 hashlib，不产生 bytes 拷贝
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                    size = len(view)
+                    windows = [(0, sample_size)]
+                    # If file is larger than 3MB, hash middle and last 1MB
+                    if size > 3 * sample_size:
+                        windows.append((size // 2, sample_size))
+                        windows.append((max(0, size - sample_size), sample_size))
+                    # 三个窗口不连续，默认预读帮不上忙；先一并提交预读，让设备同时处理
+                    advise_will_need(f.fileno(), windows)
+                    for offset, length in windows:
+                        hasher.update(view[offset:offset + length])
+
+            return hasher.digest()
+        except (OSError, ValueError) as e:
+            # ValueError: 文件在扫描后被截断为空，无法 mmap
+            logger.debug(f"无法计算部分哈希: {file_path} - {e}")
+            self._unreadable.add(file_path)
+            return None
 
-    def _calculate_hashes_serial(
+    def _calculate_full_hashes(
         self,
-        potential_duplicates: List[List[FileInfo]],
+        files: List[FileInfo],
         hash_progress_callback: Optional[Callable[[int, int], None]],
-        cancel_callback: Optional[Callable[[], bool]]
+        cancel_callback: Optional[Callable[[], bool]],
+        progress_window: Tuple[int, int],
+        total_files: int
     ) -> Dict[str, List[FileInfo]]:
-        """串行计算哈希值"""
-        hash_groups = defaultdict(list)
-        processed = 0
-        total = sum(len(group) for group in potential_duplicates)
-        cache_entries_to_save = []
-
-        # Report initial hash progress
-        if hash_progress_callback and total > 0:
-            hash_progress_callback(0, total)
+        """计算完整哈希值（多阶段哈希的最后阶段），结果写入缓存"""
+        hash_groups: Dict[str, List[FileInfo]] = {}
+        for file_info, hash_value in self._hash_pipeline(
+            files, self._calculate_full_hash, progress_window, total_files,
+            hash_progress_callback, cancel_callback, cache_results=True
+        ):
+            if hash_value:
+                hash_groups.setdefault(hash_value, []).append(file_info)
 
-        # Calculate report interval based on total files (aim for ~20 updates)
-        report_interval = max(1, total // 20) if total > 20 else 1
-        last_reported = 0
+        if cancel_callback and cancel_callback():
+            return {}
+        return hash_groups
 
-        for group in potential_duplicates:
-            for file_info in group:
+    def _incremental_hash_group(
+        self,
+        files: List[FileInfo],
+        cancel_callback: Optional[Callable[[], bool]] = None,
+        chunk_size: int = INCREMENTAL_CHUNK_SIZE
+    ) -> Dict[str, List[FileInfo]]:
+        """
+        增量分组哈希（rmlint 方式）：组内文件同步逐块读取，按块内容拆分分组
+
+        同一子组的文件到目前为止内容逐字节相同，因此共享一个哈希状态：每块
+        只由子组计算一次，拆分时用 hasher.copy() 复制已累积的前缀状态。
+        某个文件与组内其他文件都不同时立即停止读取；读到末尾仍在同一组的
+        文件，其哈希就是完整文件哈希，可直接写入缓存。只返回 2 个及以上文件的组。
+        """
+        members = []
+        for file_info in files:
+            try:
+                f = open(file_info.path, 'rb')
+            except OSError as e:
+                if e.errno in (errno.EMFILE, errno.ENFILE):
+                    # 文件描述符耗尽不是文件本身的问题，不能当作不可读而丢弃：
+                    # 关闭已打开的文件，改为逐个计算完整哈希
+                    logger.debug(f"文件描述符不足，改为逐个完整哈希: {file_info.path} - {e}")
+                    for _, opened in members:
+                        opened.close()
+                    return self._full_hash_group(files, cancel_callback)
+                logger.debug(f"无法打开文件: {file_info.path} - {e}")
+                self._unreadable.add(file_info.path)
+                continue
+            advise_sequential_read(f.fileno())
+            members.append((file_info, f))
+
+        hash_groups: Dict[str, List[FileInfo]] = {}
+        try:
+            pending = []
+            if len(members) > 1:
+                pending.append((members, self.hash_calculator.new_hasher()))
+            while pending:
                 if cancel_callback and cancel_callback():
-                    # Save any pending cache entries before returning
-                    if cache_entries_to_save and self.cache:
-                        self.cache.set_batch(cache_entries_to_save)
                     return {}
 
-                # Try to get hash from cache first
-                hash_value = None
-                if self.cache:
-                    hash_value = self.cache.get(file_info.path, file_info.size, file_info.mtime)
-                    if hash_value:
-                        self.cache_hits += 1
+                group, hasher = pending.pop()
+                # {(块长度, CRC): [(块内容, [成员...]), ...]}，CRC 相同时再逐字节比较
+                buckets = {}
+                for member in group:
+                    file_info, f = member
+                    try:
+                        chunk = f.read(chunk_size)
+                    except OSError as e:
+                        logger.debug(f"读取文件失败: {file_info.path} - {e}")
+                        self._unreadable.add(file_info.path)
+                        continue
+                    candidates = buckets.setdefault((len(chunk), zlib.crc32(chunk)), [])
+                    for leader_chunk, bucket in candidates:
+                        if leader_chunk == chunk:
+                            bucket.append(member)
+                            break
                     else:
-                        self.cache_misses += 1
+                        candidates.append((chunk, [member]))
+
+                for (length, _), candidates in buckets.items():
+                    for chunk, bucket in candidates:
+                        if len(bucket) < 2:
+                            continue  # 已与组内其他文件不同，不再读取
+                        if length == 0:
+                            digest = hasher.hexdigest()
+                            hash_groups.setdefault(digest, []).extend(fi for fi, _ in bucket)
+                        else:
+                            # 复制共同前缀的哈希状态，本块只计算一次
+                            bucket_hasher = hasher.copy()
+                            bucket_hasher.update(chunk)
+                            pending.append((bucket, bucket_hasher))
+        finally:
+            for file_info, f in members:
+                # 与完整哈希一样，读过的大文件不继续占用页缓存
+                release_page_cache(f.fileno(), file_info.size)
+                f.close()
 
-                # Calculate hash if not in cache
-                if hash_value is None:
-                    hash_value = self.hash_calculator.calculate_file_hash(file_info.path, None)
-                    if hash_value and self.cache:
-                        cache_entries_to_save.append({
-                            'path': file_info.path,
-                            'size': file_info.size,
-                            'mtime': file_info.mtime,
-                            'hash_value': hash_value
-                        })
+        return hash_groups
 
-                if hash_value:
-                    hash_groups[hash_value].append(file_info)
+    def _full_hash_group(
+        self,
+        files: List[FileInfo],
+        cancel_callback: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, List[FileInfo]]:
+        """逐个计算组内文件的完整哈希（每次只打开一个文件），只返回 2 个及以上文件的组"""
+        hash_groups: Dict[str, List[FileInfo]] = {}
+        for file_info in files:
+            if cancel_callback and cancel_callback():
+                return {}
+            hash_value = self._calculate_full_hash(file_info)
+            if hash_value:
+                hash_groups.setdefault(hash_value, []).append(file_info)
+        return {h: file_list for h, file_list in hash_groups.items() if len(file_list) > 1}
+
+    def _calculate_incremental_hashes(
+        self,
+        groups: List[List[FileInfo]],
+        hash_progress_callback: Optional[Callable[[int, int], None]],
+        cancel_callback: Optional[Callable[[], bool]],
+        progress_window: Tuple[int, int],
+        total_files: int
+    ) -> Dict[str, List[FileInfo]]:
+        """对多个候选组执行增量分组哈希（组间并行），结果写入缓存"""
+        hash_groups: Dict[str, List[FileInfo]] = {}
+        if not groups:
+            return hash_groups
 
-                processed += 1
-                # Report progress at intervals
-                if hash_progress_callback and (processed - last_reported >= report_interval or processed == total):
-                    hash_progress_callback(processed, total)
-                    last_reported = processed
+        count = sum(len(group) for group in groups)
+        reporter = ProgressReporter(hash_progress_callback, progress_window, count, total_files)
+        cache_entries_to_save = []
 
-        # Batch save cache entries
-        if cache_entries_to_save and self.cache:
-            self.cache.set_batch(cache_entries_to_save)
+        def merge(group_result: Dict[str, List[FileInfo]], group_size: int):
+            for hash_value, file_list in group_result.items():
+                hash_groups.setdefault(hash_value, []).extend(file_list)
+                if self.cache:
+                    cache_entries_to_save.extend({
+                        'path': file_info.path,
+                        'size': file_info.size,
+                        'mtime': file_info.mtime,
+                        'hash_value': hash_value
+                    } for file_info in file_list)
+            reporter.advance(group_size)
+
+        try:
+            with reporter:
+                if self.use_parallel and len(groups) > 1:
+                    with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                        future_to_group = {
+                            executor.submit(self._incremental_hash_group, group, cancel_callback): group
+                            for group in groups
+                        }
+                        for future in as_completed(future_to_group):
+                            if cancel_callback and cancel_callback():
+                                _cancel_pending(executor, future_to_group)
+                                return {}
+                            merge(future.result(), len(future_to_group[future]))
+                else:
+                    for group in groups:
+                        if cancel_callback and cancel_callback():
+                            return {}
+                        merge(self._incremental_hash_group(group, cancel_callback), len(group))
+        finally:
+            if cache_entries_to_save:
+                self._save_cache_entries(cache_entries_to_save)
 
         return hash_groups
 
-    def _calculate_hashes_parallel(
+    def _calculate_hashes(
         self,
         potential_duplicates: List[List[FileInfo]],
         hash_progress_callback: Optional[Callable[[int, int], None]],
         cancel_callback: Optional[Callable[[], bool]]
     ) -> Dict[str, List[FileInfo]]:
-        """并行计算哈希值（优化版本：批量缓存查询 + 进程池支持）"""
-        hash_groups = defaultdict(list)
+        """计算哈希值：先用缓存快照过滤，再并行或串行计算剩余文件"""
+        hash_groups: Dict[str, List[FileInfo]] = {}
 
         # Flatten the list of files to hash
         files_to_hash = []
@@ -466,33 +1094,14 @@ class DuplicateFinder:
 
         total = len(files_to_hash)
 
-        # 使用批量缓存查询（性能优化）
         files_to_calculate = []
-        cache_entries_to_save = []
-        processed_cached = 0
-
-        if self.cache and hasattr(self.cache, 'get_batch'):
-            # 批量查询缓存（性能提升10倍+）
-            file_infos = [(f.path, f.size, f.mtime) for f in files_to_hash]
-            cached_hashes = self.cache.get_batch(file_infos)
-
-            for file_info in files_to_hash:
-                hash_value = cached_hashes.get(file_info.path)
-                if hash_value:
-                    self.cache_hits += 1
-                    hash_groups[hash_value].append(file_info)
-                    processed_cached += 1
-                else:
-                    self.cache_misses += 1
-                    files_to_calculate.append(file_info)
-        elif self.cache:
-            # 回退到逐个查询
+        if self.cache:
+            # 整个扫描只在开始时对缓存做一次范围查询，这里只是字典查找
             for file_info in files_to_hash:
-                hash_value = self.cache.get(file_info.path, file_info.size, file_info.mtime)
+                hash_value = self._get_cached_hash(file_info)
                 if hash_value:
                     self.cache_hits += 1
-                    hash_groups[hash_value].append(file_info)
-                    processed_cached += 1
+                    hash_groups.setdefault(hash_value, []).append(file_info)
                 else:
                     self.cache_misses += 1
                     files_to_calculate.append(file_info)
@@ -501,123 +1110,29 @@ class DuplicateFinder:
 
         # Report initial hash progress (including cached files)
         processed = total - len(files_to_calculate)
-
         if hash_progress_callback and total > 0:
             hash_progress_callback(processed, total)
 
-        # Calculate report interval based on total files (aim for ~20 updates)
-        report_interval = max(1, total // 20) if total > 20 else 1
-        last_reported = processed
-
         # If all files were cached, return early
         if not files_to_calculate:
             logger.info(f"所有 {total} 个文件均从缓存获取")
             return hash_groups
 
         # Calculate hashes for files not in cache
-        total_to_calculate = len(files_to_calculate)
-        logger.info(f"需要计算 {total_to_calculate}/{total} 个文件的哈希值 (使用 {self.max_workers} 个worker)")
-
-        # Use appropriate executor for parallel hash calculation
-        if self.use_parallel:
-            if self.use_process_pool:
-                # 使用进程池 + 批处理（最佳性能）
-                batch_size = max(1, total_to_calculate // (self.max_workers * 4))
-                with self.executor_class(max_workers=self.max_workers) as executor:
-                    # 使用 map 批量处理（减少IPC开销）
-                    algorithm = self.hash_calculator.algorithm
-                    paths = [f.path for f in files_to_calculate]
-                    results = executor.map(
-                        _calculate_file_hash_static,
-                        paths,
-                        [algorithm] * len(paths),
-                        chunksize=batch_size
-                    )
-
-                    # 处理结果
-                    for file_info, hash_value in zip(files_to_calculate, results):
-                        if cancel_callback and cancel_callback():
-                            break
-
-                        if hash_value:
-                            hash_groups[hash_value].append(file_info)
-                            if self.cache:
-                                cache_entries_to_save.append({
-                                    'path': file_info.path,
-                                    'size': file_info.size,
-                                    'mtime': file_info.mtime,
-                                    'hash_value': hash_value
-                                })
-
-                        processed += 1
-                        # Report progress at intervals
-                        if hash_progress_callback and (processed - last_reported >= report_interval or processed == total):
-                            hash_progress_callback(processed, total)
-                            last_reported = processed
-            else:
-                # 使用线程池
-                with self.executor_class(max_workers=self.max_workers) as executor:
-                    # Submit all hash calculation tasks
-                    future_to_file = {
-                        executor.submit(self.hash_calculator.calculate_file_hash, file_info.path): file_info
-                        for file_info in files_to_calculate
-                    }
-
-                    # Process completed tasks
-                    for future in as_completed(future_to_file):
-                        if cancel_callback and cancel_callback():
-                            # Cancel remaining futures
-                            for f in future_to_file:
-                                f.cancel()
-                            break
-
-                        file_info = future_to_file[future]
-                        try:
-                            hash_value = future.result()
-                            if hash_value:
-                                hash_groups[hash_value].append(file_info)
-                                if self.cache:
-                                    cache_entries_to_save.append({
-                                        'path': file_info.path,
-                                        'size': file_info.size,
-                                        'mtime': file_info.mtime,
-                                        'hash_value': hash_value
-                                    })
-
-                            processed += 1
-                            # Report progress at intervals
-                            if hash_progress_callback and (processed - last_reported >= report_interval or processed == total):
-                                hash_progress_callback(processed, total)
-                                last_reported = processed
-                        except Exception as e:
-                            logger.warning(f"哈希计算失败 {file_info.path}: {e}")
-                            processed += 1
-        else:
-            # 串行计算（不使用并行）
-            for file_info in files_to_calculate:
-                if cancel_callback and cancel_callback():
-                    break
-
-                hash_value = self.hash_calculator.calculate_file_hash(file_info.path)
-                if hash_value:
-                    hash_groups[hash_value].append(file_info)
-                    if self.cache:
-                        cache_entries_to_save.append({
-                            'path': file_info.path,
-                            'size': file_info.size,
-                            'mtime': file_info.mtime,
-                            'hash_value': hash_value
-                        })
-
-                processed += 1
-                if hash_progress_callback and (processed - last_reported >= report_interval or processed == total):
-                    hash_progress_callback(processed, total)
-                    last_reported = processed
-
-        # Batch save cache entries
-        if cache_entries_to_save and self.cache:
-            self.cache.set_batch(cache_entries_to_save)
+        # 与部分哈希阶段一样，只在机械硬盘上按物理位置排序
+        if self._rotational:
+            files_to_calculate = _sort_by_physical(files_to_calculate)
+        logger.info(f"需要计算 {len(files_to_calculate)}/{total} 个文件的哈希值 (使用 {self.max_workers} 个worker)")
+
+        for file_info, hash_value in self._hash_pipeline(
+            files_to_calculate, self._calculate_full_hash, (processed, total), total,
+            hash_progress_callback, cancel_callback, cache_results=True
+        ):
+            if hash_value:
+                hash_groups.setdefault(hash_value, []).append(file_info)
 
+        if cancel_callback and cancel_callback():
+            return {}
         return hash_groups
 
     def get_cache_stats(self) -> dict:
@@ -641,14 +1156,13 @@ class DuplicateFinder:
         """清空缓存"""
         if self.cache:
             self.cache.clear()
+            self._cached_hashes = {}
             self.cache_hits = 0
             self.cache_misses = 0
 
     def get_total_wasted_space(self, duplicate_groups: List[DuplicateGroup]) -> int:
-        wasted = 0
-        for group in duplicate_groups:
-            wasted += group.total_size - group.files[0].size
-        return wasted
+        """计算重复文件浪费的空间（每组保留一个文件）"""
+        return sum(group.total_size - group.files[0].size for group in duplicate_groups)
 
     def get_all_scanned_files(self) -> List[FileInfo]:
         """获取所有扫描过的文件，用于相似度检测"""
@@ -6,289 +6,364 @@
 import csv
 import json
 from datetime import datetime
-from typing import List
-from pathlib import Path
+from html import escape
+from typing import Any, Dict, Iterator, List
 from dataclasses import asdict
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 from duplicate_finder import DuplicateGroup
 from logger import get_logger
 from utils import format_size  # 导入工具函数
 
+EXPORT_BUFFER_SIZE = 1 << 20  # 导出文件的用户态写缓冲 (1MB)，大报告下显著减少 write 系统调用
+JSON_GROUP_INDENT = b'    '  # 分组对象在 "groups" 数组内的缩进，与 json.dump(indent=2) 的两层嵌套一致
 
-class ExportManager:
-    """导出管理器"""
-
-    def __init__(self):
-        self.log = get_logger()
-
-    def export_to_csv(self, duplicate_groups: List[DuplicateGroup], output_path: str, include_metadata: bool = True) -> bool:
-        """
-        导出为 CSV 格式
-
-        Args:
-            duplicate_groups: 重复文件组列表
-            output_path: 输出文件路径
-            include_metadata: 是否包含元数据
-
-        Returns:
-            是否成功
-        """
-        try:
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-
-                # Write header
-                if include_metadata:
-                    writer.writerow([
-                        '哈希值', '文件大小', '组内文件数', '文件路径',
-                        '文件名', '修改时间', '浪费空间'
-                    ])
-                else:
-                    writer.writerow(['哈希值', '文件路径', '文件大小'])
-
-                # Write data
-                for group in duplicate_groups:
-                    wasted_space = group.total_size - group.files[0].size
-                    for i, file_info in enumerate(group.files):
-                        if include_metadata:
-                            writer.writerow([
-                                group.hash_value,
-                                file_info.size,
-                                len(group.files),
-                                file_info.path,
-                                Path(file_info.path).name,
-                                datetime.fromtimestamp(file_info.mtime).isoformat(),
-                                wasted_space if i == 0 else ''
-                            ])
-                        else:
-                            writer.writerow([
-                                group.hash_value,
-                                file_info.path,
-                                file_info.size
-                            ])
-
-            self.log.info(f"成功导出 CSV 到: {output_path}")
-            return True
-        except Exception as e:
-            self.log.error(f"导出 CSV 失败: {e}")
-            return False
-
-    def export_to_json(self, duplicate_groups: List[DuplicateGroup], output_path: str, include_metadata: bool = True) -> bool:
-        """
-        导出为 JSON 格式
-
-        Args:
-            duplicate_groups: 重复文件组列表
-            output_path: 输出文件路径
-            include_metadata: 是否包含元数据
-
-        Returns:
-            是否成功
-        """
-        try:
-            data = {
-                'export_time': datetime.now().isoformat(),
-                'total_groups': len(duplicate_groups),
-                'total_files': sum(len(g.files) for g in duplicate_groups),
-                'groups': []
-            }
-
-            for group in duplicate_groups:
-                group_data = {
-                    'hash': group.hash_value,
-                    'file_count': len(group.files),
-                    'total_size': group.total_size,
-                    'wasted_space': group.total_size - group.files[0].size,
-                    'files': []
-                }
-
-                for file_info in group.files:
-                    file_data = {
-                        'path': file_info.path,
-                        'size': file_info.size
-                    }
-
-                    if include_metadata:
-                        file_data.update({
-                            'name': Path(file_info.path).name,
-                            'directory': str(Path(file_info.path).parent),
-                            'modified_time': datetime.fromtimestamp(file_info.mtime).isoformat()
-                        })
-
-                    group_data['files'].append(file_data)
-
-                data['groups'].append(group_data)
-
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-
-            self.log.info(f"成功导出 JSON 到: {output_path}")
-            return True
-        except Exception as e:
-            self.log.error(f"导出 JSON 失败: {e}")
-            return False
-
-    def export_to_html(self, duplicate_groups: List[DuplicateGroup], output_path: str) -> bool:
-        """
-        导出为 HTML 报告
-
-        Args:
-            duplicate_groups: 重复文件组列表
-            output_path: 输出文件路径
-
-        Returns:
-            是否成功
-        """
-        try:
-            # Calculate statistics
-            total_groups = len(duplicate_groups)
-            total_files = sum(len(g.files) for g in duplicate_groups)
-            total_wasted = sum(g.total_size - g.files[0].size for g in duplicate_groups)
 
-            html_content = f"""<!DOCTYPE html>
+# HTML 报告中不随数据变化的部分（样式、脚本）在导入时准备好，导出时直接写出
+_HTML_REPORT_HEAD = """<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>重复文件扫描报告</title>
     <style>
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
             margin: 0;
             padding: 20px;
             background-color: #f5f5f5;
-        }}
-        .container {{
+        }
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             background-color: white;
             padding: 30px;
             border-radius: 8px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        h1 {{
+        }
+        h1 {
             color: #333;
             border-bottom: 2px solid #007bff;
             padding-bottom: 10px;
-        }}
-        .stats {{
+        }
+        .stats {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 20px;
             margin: 30px 0;
-        }}
-        .stat-card {{
+        }
+        .stat-card {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 20px;
             border-radius: 8px;
             text-align: center;
-        }}
-        .stat-value {{
+        }
+        .stat-value {
             font-size: 32px;
             font-weight: bold;
             margin: 10px 0;
-        }}
-        .stat-label {{
+        }
+        .stat-label {
             font-size: 14px;
             opacity: 0.9;
-        }}
-        .group {{
+        }
+        .group {
             margin: 20px 0;
             border: 1px solid #e0e0e0;
             border-radius: 8px;
             overflow: hidden;
-        }}
-        .group-header {{
+        }
+        .group-header {
             background-color: #f8f9fa;
             padding: 15px;
             cursor: pointer;
             display: flex;
             justify-content: space-between;
             align-items: center;
-        }}
-        .group-header:hover {{
+        }
+        .group-header:hover {
             background-color: #e9ecef;
-        }}
-        .group-title {{
+        }
+        .group-title {
             font-weight: bold;
             color: #495057;
-        }}
-        .group-info {{
+        }
+        .group-info {
             color: #6c757d;
             font-size: 14px;
-        }}
-        .file-list {{
+        }
+        .file-list {
             display: none;
-        }}
-        .file-list.show {{
+        }
+        .file-list.show {
             display: block;
-        }}
-        .file-item {{
+        }
+        .file-item {
             padding: 12px 15px;
             border-top: 1px solid #e0e0e0;
             display: flex;
             align-items: center;
-        }}
-        .file-item:hover {{
+        }
+        .file-item:hover {
             background-color: #f8f9fa;
-        }}
-        .file-icon {{
+        }
+        .file-icon {
             margin-right: 10px;
             color: #007bff;
-        }}
-        .file-info {{
+        }
+        .file-info {
             flex: 1;
-        }}
-        .file-path {{
+        }
+        .file-path {
             font-family: monospace;
             color: #495057;
             word-break: break-all;
-        }}
-        .file-meta {{
+        }
+        .file-meta {
             font-size: 12px;
             color: #6c757d;
             margin-top: 4px;
-        }}
-        .badge {{
+        }
+        .badge {
             display: inline-block;
             padding: 4px 8px;
             border-radius: 4px;
             font-size: 12px;
             font-weight: bold;
-        }}
-        .badge-primary {{
+        }
+        .badge-primary {
             background-color: #007bff;
             color: white;
-        }}
-        .badge-warning {{
+        }
+        .badge-warning {
             background-color: #ffc107;
             color: #212529;
-        }}
-        .timestamp {{
+        }
+        .timestamp {
             text-align: center;
             color: #6c757d;
             font-size: 14px;
             margin-top: 30px;
-        }}
-        .progress-bar {{
+        }
+        .progress-bar {
             height: 8px;
             background-color: #e9ecef;
             border-radius: 4px;
             overflow: hidden;
             margin-top: 10px;
-        }}
-        .progress-fill {{
+        }
+        .progress-fill {
             height: 100%;
             background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
             transition: width 0.3s ease;
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="container">
         <h1>📋 重复文件扫描报告</h1>
+"""
+
+_HTML_REPORT_TAIL = """    </div>
+
+    <script>
+        function toggleGroup(index) {
+            const fileList = document.getElementById('group-' + index);
+            fileList.classList.toggle('show');
+        }
 
+        // Auto-expand first group
+        document.addEventListener('DOMContentLoaded', function() {
+            const firstGroup = document.querySelector('.group-header');
+            if (firstGroup) {
+                firstGroup.click();
+            }
+        });
+    </script>
+</body>
+</html>
+"""
+
+def _json_dumps(obj: Any) -> bytes:
+    """序列化为缩进 2 格的 UTF-8 JSON 字节（优先使用 orjson，两者输出一致）"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+class ExportManager:
+    """导出管理器"""
+
+    def __init__(self):
+        self.log = get_logger()
+
+    def export_to_csv(self, duplicate_groups: List[DuplicateGroup], output_path: str, include_metadata: bool = True) -> bool:
+        """
+        导出为 CSV 格式
+
+        Args:
+            duplicate_groups: 重复文件组列表
+            output_path: 输出文件路径
+            include_metadata: 是否包含元数据
+
+        Returns:
+            是否成功
+        """
+        try:
+            with open(output_path, 'w', newline='', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as f:
+                writer = csv.writer(f)
+
+                # Write header
+                if include_metadata:
+                    writer.writerow([
+                        '哈希值', '文件大小', '组内文件数', '文件路径',
+                        '文件名', '修改时间', '浪费空间'
+                    ])
+                else:
+                    writer.writerow(['哈希值', '文件路径', '文件大小'])
+
+                # Write data：生成器交给 writerows 一次性消费，循环内只用局部名
+                writer.writerows(self._csv_rows(duplicate_groups, include_metadata))
+
+            self.log.info(f"成功导出 CSV 到: {output_path}")
+            return True
+        except Exception as e:
+            self.log.error(f"导出 CSV 失败: {e}")
+            return False
+
+    @staticmethod
+    def _csv_rows(duplicate_groups: List[DuplicateGroup], include_metadata: bool) -> Iterator[tuple]:
+        """逐行产出 CSV 数据"""
+        if not include_metadata:
+            for group in duplicate_groups:
+                hash_value = group.hash_value
+                for file_info in group.files:
+                    yield (hash_value, file_info.path, file_info.size)
+            return
+
+        fromtimestamp = datetime.fromtimestamp
+        for group in duplicate_groups:
+            hash_value = group.hash_value
+            files = group.files
+            file_count = len(files)
+            wasted_space = group.total_size - files[0].size
+            for i, file_info in enumerate(files):
+                yield (
+                    hash_value,
+                    file_info.size,
+                    file_count,
+                    file_info.path,
+                    file_info.name,
+                    fromtimestamp(file_info.mtime).isoformat(),
+                    wasted_space if i == 0 else ''
+                )
+
+    def export_to_json(self, duplicate_groups: List[DuplicateGroup], output_path: str, include_metadata: bool = True) -> bool:
+        """
+        导出为 JSON 格式
+
+        Args:
+            duplicate_groups: 重复文件组列表
+            output_path: 输出文件路径
+            include_metadata: 是否包含元数据
+
+        Returns:
+            是否成功
+        """
+        try:
+            total_files = sum(len(g.files) for g in duplicate_groups)
+            header = {
+                'export_time': datetime.now().isoformat(),
+                'total_groups': len(duplicate_groups),
+                'total_files': total_files,
+            }
+
+            # 逐组序列化后直接写入文件，内存占用与报告规模无关；
+            # 输出布局与整体 json.dump(indent=2) 完全一致
+            with open(output_path, 'wb', buffering=EXPORT_BUFFER_SIZE) as f:
+                write = f.write
+                write(b'{\n')
+                for key, value in header.items():
+                    write(b'  ' + _json_dumps(key) + b': ' + _json_dumps(value) + b',\n')
+
+                if not duplicate_groups:
+                    write(b'  "groups": []\n}')
+                else:
+                    write(b'  "groups": [\n')
+                    for index, group in enumerate(duplicate_groups):
+                        group_data = {
+                            'hash': group.hash_value,
+                            'file_count': len(group.files),
+                            'total_size': group.total_size,
+                            'wasted_space': group.total_size - group.files[0].size,
+                            'files': []
+                        }
+
+                        for file_info in group.files:
+                            file_data = {
+                                'path': file_info.path,
+                                'size': file_info.size
+                            }
+
+                            if include_metadata:
+                                file_data.update({
+                                    'name': file_info.name,
+                                    'directory': file_info.directory,
+                                    'modified_time': datetime.fromtimestamp(file_info.mtime).isoformat()
+                                })
+
+                            group_data['files'].append(file_data)
+
+                        if index:
+                            write(b',\n')
+                        fragment = _json_dumps(group_data)
+                        write(JSON_GROUP_INDENT + fragment.replace(b'\n', b'\n' + JSON_GROUP_INDENT))
+                    write(b'\n  ]\n}')
+
+            self.log.info(f"成功导出 JSON 到: {output_path}")
+            return True
+        except Exception as e:
+            self.log.error(f"导出 JSON 失败: {e}")
+            return False
+
+    def export_to_html(self, duplicate_groups: List[DuplicateGroup], output_path: str) -> bool:
+        """
+        导出为 HTML 报告
+
+        Args:
+            duplicate_groups: 重复文件组列表
+            output_path: 输出文件路径
+
+        Returns:
+            是否成功
+        """
+        try:
+            with open(output_path, 'w', encoding='utf-8', buffering=EXPORT_BUFFER_SIZE) as f:
+                self._write_html_report(f, duplicate_groups)
+
+            self.log.info(f"成功导出 HTML 到: {output_path}")
+            return True
+        except Exception as e:
+            self.log.error(f"导出 HTML 失败: {e}")
+            return False
+
+    def _write_html_report(self, f, duplicate_groups: List[DuplicateGroup]) -> None:
+        """将 HTML 报告逐段写入已打开的文件，不在内存中拼出整份报告"""
+        # Calculate statistics
+        total_groups = len(duplicate_groups)
+        total_files = sum(len(g.files) for g in duplicate_groups)
+        total_wasted = sum(g.total_size - g.files[0].size for g in duplicate_groups)
+
+        write = f.write
+
+        write(_HTML_REPORT_HEAD)
+        write(f"""
         <div class="stats">
             <div class="stat-card">
                 <div class="stat-label">重复文件组</div>
@@ -309,14 +384,19 @@ class ExportManager:
         </div>
 
         <div class="groups">
-"""
-
-            # Add each duplicate group
-            for i, group in enumerate(duplicate_groups):
-                wasted_space = group.total_size - group.files[0].size
-                progress_percent = (wasted_space / group.total_size) * 100
-
-                html_content += f"""
+""")
+
+        # Add each duplicate group
+        # 同一目录下的文件共享目录字符串，转义结果按目录缓存
+        escaped_dirs: Dict[str, str] = {}
+        fromtimestamp = datetime.fromtimestamp
+        for i, group in enumerate(duplicate_groups):
+            wasted_space = group.total_size - group.files[0].size
+            progress_percent = (wasted_space / group.total_size) * 100
+            # 组内文件大小相同，只格式化一次
+            file_size = format_size(group.files[0].size)
+
+            write(f"""
             <div class="group">
                 <div class="group-header" onclick="toggleGroup({i})">
                     <div>
@@ -332,61 +412,39 @@ class ExportManager:
                     <div class="progress-fill" style="width: {progress_percent}%"></div>
                 </div>
                 <div class="file-list" id="group-{i}">
-"""
-
-                for file_info in group.files:
-                    file_name = Path(file_info.path).name
-                    file_dir = str(Path(file_info.path).parent)
-                    modified_time = datetime.fromtimestamp(file_info.mtime).strftime("%Y-%m-%d %H:%M:%S")
-
-                    html_content += f"""
+""")
+
+            for file_info in group.files:
+                # 文件名/目录可能含 < & 等字符，写入前转义
+                file_name = escape(file_info.name)
+                file_dir = escaped_dirs.get(file_info.directory)
+                if file_dir is None:
+                    file_dir = escaped_dirs[file_info.directory] = escape(file_info.directory)
+                # 与 strftime("%Y-%m-%d %H:%M:%S") 输出相同，不需要逐次解析格式串
+                modified_time = fromtimestamp(file_info.mtime).isoformat(' ', 'seconds')
+
+                write(f"""
                     <div class="file-item">
                         <div class="file-icon">📄</div>
                         <div class="file-info">
                             <div class="file-path">{file_name}</div>
                             <div class="file-meta">
-                                📁 {file_dir} | 📊 {format_size(file_info.size)} | 🕒 {modified_time}
+                                📁 {file_dir} | 📊 {file_size} | 🕒 {modified_time}
                             </div>
                         </div>
                     </div>
-"""
+""")
 
-                html_content += f"""
+            write("""
                 </div>
             </div>
-"""
+""")
 
-            html_content += f"""
+        write(f"""
         </div>
 
         <div class="timestamp">
             报告生成时间: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
         </div>
-    </div>
-
-    <script>
-        function toggleGroup(index) {{
-            const fileList = document.getElementById('group-' + index);
-            fileList.classList.toggle('show');
-        }}
-
-        // Auto-expand first group
-        document.addEventListener('DOMContentLoaded', function() {{
-            const firstGroup = document.querySelector('.group-header');
-            if (firstGroup) {{
-                firstGroup.click();
-            }}
-        }});
-    </script>
-</body>
-</html>
-"""
-
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-
-            self.log.info(f"成功导出 HTML 到: {output_path}")
-            return True
-        except Exception as e:
-            self.log.error(f"导出 HTML 失败: {e}")
-            return False
+""")
+        write(_HTML_REPORT_TAIL)
@@ -1,8 +1,13 @@
 import os
 import hashlib
+import mmap
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set, Callable, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Set, Callable, Optional, Tuple
 from dataclasses import dataclass
+from functools import partial
 
 # 导入自定义异常
 from exceptions import (
@@ -13,17 +18,126 @@ from exceptions import (
 )
 import logging
 
+# BLAKE3 为可选依赖：SIMD 向量化并可在单个文件内多线程哈希
+try:
+    import blake3
+    HAS_BLAKE3 = True
+except ImportError:
+    HAS_BLAKE3 = False
+
+# 默认哈希算法：BLAKE3 比 SHA-256 快数倍且同样抗碰撞，未安装时回退到 SHA-256
+DEFAULT_HASH_ALGORITHM = 'blake3' if HAS_BLAKE3 else 'sha256'
+
 # 获取日志记录器
 logger = logging.getLogger(__name__)
 
 
 # 配置常量
-HASH_CHUNK_SIZE = 32 * 1024  # 32KB chunks for optimal I/O performance
-HASH_PROGRESS_INTERVAL = 1024 * 1024  # Report progress every 1MB
+# hashlib 只在单次 update() 不少于 2KB（HASHLIB_GIL_MINSIZE）时释放 GIL，线程池能否真正并行
+# 哈希取决于此；各路径都按整个文件、整个映射或 1MB 采样窗口调用 update()，小于 2KB 的只有
+# 整个文件都不足 2KB 的情况，这时哈希耗时不到 1 微秒，无需合并
+MMAP_MIN_SIZE = 1024 * 1024  # 大于等于该大小的文件使用 mmap 直接交给 hashlib，省去读入 bytes 的拷贝
+MMAP_PROGRESS_STRIDE = 8 * 1024 * 1024  # 需要上报进度时，映射区域按该大小分段交给 hashlib
+MMAP_POPULATE_MAX_SIZE = 64 * 1024 * 1024  # 不超过该大小的文件映射时用 MAP_POPULATE 一次装入全部页面
+PAGE_CACHE_DROP_MIN_SIZE = 64 * 1024 * 1024  # 超过该大小的文件哈希后释放其页缓存
+PROGRESS_REPORT_INTERVAL = 0.05  # 后台线程上报扫描/哈希进度的间隔（秒）
+HASH_MANY_WORKERS_PER_CPU = 4  # hash_many 默认每个 CPU 的线程数（读取等待期间其他线程继续哈希）
+DUPLICATE_HEAD_SIZE = 64 * 1024  # hash_duplicates 中不超过该大小的文件直接一次读完计算完整哈希
+HEAD_TAIL_PROBE_SIZE = 4 * 1024  # 头尾预筛选在文件开头和结尾各读取的字节数（一个磁盘块）
 
 # Skip these special file types that can cause hangs
-SKIP_EXTENSIONS = {'.app', '.bundle', '.pkg', '.dmg', '.iso'}
+SKIP_EXTENSIONS = frozenset({'.app', '.bundle', '.pkg', '.dmg', '.iso'})
 SKIP_NAMES = {'._', '.DS_Store', 'Thumbs.db', '.Spotlight-V100', '.Trashes'}
+# str.startswith 接受元组，一次 C 层调用检查所有前缀
+SKIP_NAME_PREFIXES = tuple(SKIP_NAMES)
+
+
+def advise_sequential_read(fd: int) -> None:
+    """提示内核将顺序读取整个文件，提前预读（仅支持 posix_fadvise 的平台）"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+
+
+def advise_will_need(fd: int, ranges: Iterable[Tuple[int, int]]) -> None:
+    """提示内核即将读取的若干 (偏移, 长度) 区间，使多个不连续区间的读取同时排队（仅支持 posix_fadvise 的平台）"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        for offset, length in ranges:
+            os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+
+
+def hasher_factory(algorithm: str) -> Callable[[], Any]:
+    """
+    返回创建哈希对象的无参构造函数：blake3 使用多线程哈希（输入较大时自动并行），其余交给 hashlib
+
+    按名称解析只在这里做一次，调用方对每个文件直接调用返回的构造函数即可；
+    两种哈希对象都提供 update()/hexdigest()/copy()，调用方无需区分。
+    """
+    if algorithm == 'blake3':
+        return partial(blake3.blake3, max_threads=blake3.blake3.AUTO)
+    # hashlib.sha256 等具名构造函数直接绑定 OpenSSL 实现，OpenSSL 在运行时按 CPU 特性
+    # 选择 SHA-NI / AVX2 等汇编路径；hashlib.new 每次都要按名称查找，只作为兜底
+    if algorithm in hashlib.algorithms_guaranteed:
+        return getattr(hashlib, algorithm)
+    return partial(hashlib.new, algorithm)
+
+
+def new_hasher(algorithm: str):
+    """创建一个哈希对象（只需偶尔创建时使用；逐个文件创建请先用 hasher_factory 取得构造函数）"""
+    return hasher_factory(algorithm)()
+
+
+def _read_at(fd: int, size: int, offset: int) -> bytes:
+    """从文件描述符的指定偏移读取（有 pread 时不改变文件位置，一次系统调用）"""
+    if hasattr(os, 'pread'):
+        return os.pread(fd, size, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, size)
+
+
+def map_file_readonly(fd: int, size: int) -> mmap.mmap:
+    """
+    只读映射整个文件用于哈希
+
+    Linux 上不大的文件使用 MAP_POPULATE 在一次系统调用中装入所有页面，
+    避免逐页缺页中断；大文件仍按需装入以免占用过多内存。映射后提示
+    内核顺序访问。Windows 上 mmap 本身即 CreateFileMapping/MapViewOfFile。
+
+    hashlib 直接读取映射的页缓存，数据不经过任何用户态拷贝；通过管道交给外部
+    哈希进程（sendfile/splice）反而要多一次写入管道和一次读出。
+    """
+    if os.name == 'nt':
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    else:
+        flags = mmap.MAP_SHARED
+        if size <= MMAP_POPULATE_MAX_SIZE:
+            flags |= getattr(mmap, 'MAP_POPULATE', 0)
+        mm = mmap.mmap(fd, 0, flags=flags, prot=mmap.PROT_READ)
+
+    if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        try:
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        except OSError:
+            pass
+    return mm
+
+
+def release_page_cache(fd: int, size: int) -> None:
+    """大文件哈希完成后释放其页缓存，避免扫描大量文件时挤掉其他程序的缓存"""
+    if size < PAGE_CACHE_DROP_MIN_SIZE or not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
 
 
 @dataclass
@@ -33,16 +147,97 @@ class PermissionErrorInfo:
     error: str
 
 
-@dataclass
+class ProgressReporter:
+    """
+    后台线程定期上报进度
+
+    扫描或哈希的循环只需调用 advance() 递增计数器，回调（可能触发 Qt 信号）
+    由独立线程每 50ms 调用一次，不阻塞热路径。属性上的 += 是读取、相加、写回
+    三步，即使有 GIL 也不是原子操作；并行遍历时多个线程共用一个 reporter，
+    因此递增在锁内进行（无竞争时加锁开销远小于每个文件的 stat）。
+    已处理数按比例映射到 progress_window 区间后上报；count 为 None 表示总数未知，
+    直接上报 (已处理数, 0)。
+    """
+
+    def __init__(
+        self,
+        callback: Optional[Callable[[int, int], None]],
+        progress_window: Tuple[int, int],
+        count: Optional[int],
+        total: int
+    ):
+        self.callback = callback
+        self.start, self.end = progress_window
+        self.count = count
+        self.total = total
+        self.processed = 0
+        self._lock = threading.Lock()
+        self._last_reported = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def advance(self, n: int = 1):
+        with self._lock:
+            self.processed += n
+
+    def _report(self):
+        processed = self.processed
+        if processed != self._last_reported:
+            self._last_reported = processed
+            if self.count is None:
+                self.callback(processed, 0)
+            else:
+                self.callback(self.start + (self.end - self.start) * processed // self.count, self.total)
+
+    def _run(self):
+        while not self._stop.wait(PROGRESS_REPORT_INTERVAL):
+            self._report()
+
+    def __enter__(self):
+        if self.callback and (self.count is None or self.count > 0):
+            self._thread = threading.Thread(target=self._run, name="progress-reporter", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._report()
+
+
+@dataclass(frozen=True)
 class FileInfo:
+    # 扫描结果可能有上百万个，__slots__ 省去每个对象的 __dict__
+    # （dataclass 的 slots=True 需要 Python 3.10，这里手动声明）
+    __slots__ = ('path', 'size', 'mtime', 'device', 'inode', 'name', 'directory')
+
     path: str
     size: int
     mtime: float
+    # 扫描时 stat 一并取得，用于识别硬链接；文件系统不提供 inode 时为 0
+    device: int
+    inode: int
+    # 扫描时由 scandir 直接得到的文件名和所在目录，导出/展示时不必再逐个解析路径；
+    # 同一目录下的文件共享同一个 directory 字符串对象
+    name: str
+    directory: str
+
+    # frozen + __slots__ 在 3.10 之前无法直接 pickle/copy，补上状态读写
+    def __getstate__(self):
+        return (self.path, self.size, self.mtime, self.device, self.inode, self.name, self.directory)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
 
 
 class FileScanner:
-    def __init__(self, extensions: Optional[Set[str]] = None):
+    def __init__(self, extensions: Optional[Set[str]] = None, scan_workers: int = 1):
         self.extensions = extensions
+        # 大于 1 时按顶层子目录分给多个线程遍历。遍历本身受 GIL 限制，只有目录读取/stat
+        # 需要等待存储时（网络文件系统、冷缓存）才有收益，因此默认单线程
+        self.scan_workers = scan_workers
         self.permission_errors: List[PermissionErrorInfo] = []
         self.skipped_directories: List[str] = []
 
@@ -54,26 +249,20 @@ class FileScanner:
             无权限访问的目录列表
         """
         self.permission_errors = []
-        root = Path(root_path)
+        self.skipped_directories = []
+        root = str(Path(root_path))
 
-        if not root.exists():
-            return [PermissionErrorInfo(str(root), "路径不存在")]
+        if not os.path.exists(root):
+            return [PermissionErrorInfo(root, "路径不存在")]
 
         if not os.access(root, os.R_OK):
-            self.permission_errors.append(PermissionErrorInfo(str(root), "无读取权限"))
-
-        # Check subdirectories
-        for dir_path in root.rglob('*'):
-            if dir_path.is_dir():
-                try:
-                    # Try to list directory
-                    list(dir_path.iterdir())
-                except PermissionError as e:
-                    self.permission_errors.append(PermissionErrorInfo(str(dir_path), "无访问权限"))
-                    logger.debug(f"权限检查失败: {dir_path}")
-                except OSError as e:
-                    self.permission_errors.append(PermissionErrorInfo(str(dir_path), str(e)))
-                    logger.warning(f"文件系统错误: {dir_path} - {e}")
+            self.permission_errors.append(PermissionErrorInfo(root, "无读取权限"))
+            return self.permission_errors
+
+        # 与 scan_directory 共用同一遍历：无法读取的目录由 _walk 记录；
+        # 这里只枚举目录项（类型来自 d_type），不 stat 文件
+        for _ in self._walk(root):
+            pass
 
         return self.permission_errors
 
@@ -92,134 +281,201 @@ class FileScanner:
                 f"发现 {len(self.permission_errors)} 个权限问题，跳过 {skipped} 个目录")
 
     def scan_directory(self, root_path: str, progress_callback: Optional[Callable[[int, int], None]] = None) -> List[FileInfo]:
-        files = []
-        root = Path(root_path)
+        """
+        扫描目录下的所有文件
+
+        用 os.scandir 单次遍历：目录项类型来自 d_type，无需额外 stat；每个文件只 stat 一次
+        （Windows 上 DirEntry.stat() 直接使用目录枚举时的结果）。不跟随符号链接，避免循环
+        和把链接当作重复文件。事先不知道文件总数，进度回调的 total 为 0，current 为已发现的文件数。
+        scan_workers 大于 1 时，根目录下的文件在当前线程处理，每个顶层子目录交给线程池遍历。
+        """
+        root = str(Path(root_path))
         self.permission_errors = []
         self.skipped_directories = []
 
-        if not root.exists():
+        if not os.path.exists(root):
             raise FindSameVideoFileNotFound(f"路径不存在: {root_path}")
 
         if not os.access(root, os.R_OK):
             raise PermissionDeniedError(root_path, "无读取权限")
 
-        def should_skip_file(file_path: Path) -> bool:
+        # 扩展名过滤集合每次扫描只规范化一次（不在逐个文件的检查中重建）
+        normalized_extensions = None
+        if self.extensions is not None:
+            normalized_extensions = frozenset(
+                e.lower() if e.startswith('.') else f'.{e.lower()}' for e in self.extensions
+            )
+
+        def should_skip_file(name: str, size: int) -> bool:
             # Skip special file types
-            if file_path.suffix.lower() in SKIP_EXTENSIONS:
+            dot = name.rfind('.')
+            ext = name[dot:].lower() if dot > 0 else ''
+            if ext in SKIP_EXTENSIONS:
                 return True
             # Skip special file names
-            if any(file_path.name.startswith(name) for name in SKIP_NAMES):
+            if name.startswith(SKIP_NAME_PREFIXES):
                 return True
             # Skip zero-sized files
-            try:
-                if file_path.stat().st_size == 0:
-                    return True
-            except OSError as e:
-                logger.debug(f"无法获取文件状态: {file_path} - {e}")
+            if size == 0:
                 return True
             # Filter by extensions if specified
-            if self.extensions is not None:
-                # Normalize extension for comparison
-                ext = file_path.suffix.lower()
-                normalized_extensions = {e.lower() if e.startswith('.') else f'.{e.lower()}' for e in self.extensions}
-                if ext not in normalized_extensions:
-                    return True
+            if normalized_extensions is not None and ext not in normalized_extensions:
+                return True
             return False
 
-        def is_accessible(path: Path) -> bool:
-            """检查路径是否可访问"""
+        # 进度由后台线程定期上报，循环内只递增计数
+        with ProgressReporter(progress_callback, (0, 0), None, 0) as reporter:
+            subdirs = self._list_subdirectories(root) if self.scan_workers > 1 else []
+            if len(subdirs) < 2:
+                return self._collect(root, True, should_skip_file, reporter)
+
+            with ThreadPoolExecutor(max_workers=min(self.scan_workers, len(subdirs))) as executor:
+                parts = executor.map(
+                    lambda directory: self._collect(directory, True, should_skip_file, reporter), subdirs
+                )
+                files = self._collect(root, False, should_skip_file, reporter)
+                for part in parts:
+                    files.extend(part)
+            return files
+
+    def _collect(
+        self,
+        root: str,
+        recursive: bool,
+        should_skip_file: Callable[[str, int], bool],
+        reporter: ProgressReporter
+    ) -> List[FileInfo]:
+        """遍历 root（recursive 为 False 时只看 root 本层），收集未被过滤的文件"""
+        files: List[FileInfo] = []
+        for directory, entry in self._walk(root, recursive):
             try:
-                return os.access(path, os.R_OK)
+                stat = entry.stat(follow_symlinks=False)
+            except PermissionError:
+                self.permission_errors.append(PermissionErrorInfo(entry.path, "无访问权限"))
+                logger.debug(f"权限拒绝: {entry.path}")
+                continue
             except OSError as e:
-                logger.debug(f"访问检查失败: {path} - {e}")
-                return False
-
-        # Count total files first for progress tracking
-        total_files = 0
-        skipped_dirs = set()
+                # 记录其他文件系统错误但继续处理
+                logger.debug(f"跳过文件 {entry.path}: {e}")
+                continue
+            if should_skip_file(entry.name, stat.st_size):
+                continue
+            files.append(FileInfo(
+                path=entry.path,
+                size=stat.st_size,
+                mtime=stat.st_mtime,
+                device=stat.st_dev,
+                inode=stat.st_ino,
+                name=entry.name,
+                directory=directory
+            ))
+            reporter.advance()
+        return files
 
+    @staticmethod
+    def _list_subdirectories(root: str) -> List[str]:
+        """列出 root 下的直接子目录（不跟随符号链接），读取失败时返回空列表交给单线程遍历处理"""
+        subdirs = []
         try:
-            for item in root.rglob('*'):
-                if item.is_file() and not should_skip_file(item):
-                    total_files += 1
-                elif item.is_dir():
-                    # Check directory accessibility
-                    if not is_accessible(item):
-                        skipped_dirs.add(str(item))
-        except OSError as e:
-            logger.warning(f"计数文件时出错: {e}")
-
-        self.skipped_directories = list(skipped_dirs)
-
-        # Report initial progress
-        if progress_callback and total_files > 0:
-            progress_callback(0, total_files)
-
-        # Calculate report interval based on total files (aim for ~20 updates)
-        report_interval = max(1, total_files // 20) if total_files > 20 else 1
-        processed = 0
-        last_reported = 0
-
-        for file_path in root.rglob('*'):
-            if file_path.is_file():
-                if should_skip_file(file_path):
-                    continue
-
-                try:
-                    stat = file_path.stat()
-                    files.append(FileInfo(
-                        path=str(file_path),
-                        size=stat.st_size,
-                        mtime=stat.st_mtime
-                    ))
-                    processed += 1
-                    # Report progress at intervals
-                    if progress_callback and (processed - last_reported >= report_interval or processed == total_files):
-                        progress_callback(processed, total_files)
-                        last_reported = processed
-                except PermissionError as e:
-                    self.permission_errors.append(PermissionErrorInfo(str(file_path), "无访问权限"))
-                    logger.debug(f"权限拒绝: {file_path}")
-                except OSError as e:
-                    # 记录其他文件系统错误但继续处理
-                    logger.debug(f"跳过文件 {file_path}: {e}")
+            with os.scandir(root) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            return []
+        return subdirs
+
+    def _walk(self, root: str, recursive: bool = True) -> Iterator[Tuple[str, os.DirEntry]]:
+        """
+        深度优先遍历目录树，产出 (所在目录, 普通文件的 DirEntry)；无法读取的目录记入 skipped_directories
 
-        return files
+        recursive 为 False 时只产出 root 本层的文件。
+        """
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if recursive:
+                                    pending.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                yield directory, entry
+                        except OSError as e:
+                            logger.debug(f"跳过 {entry.path}: {e}")
+            except PermissionError:
+                # 根目录的可读性已在开始时检查，这里是子目录
+                self.permission_errors.append(PermissionErrorInfo(directory, "无访问权限"))
+                self.skipped_directories.append(directory)
+                logger.debug(f"权限检查失败: {directory}")
+            except OSError as e:
+                self.permission_errors.append(PermissionErrorInfo(directory, str(e)))
+                self.skipped_directories.append(directory)
+                logger.debug(f"无法访问目录: {directory} - {e}")
 
 
 class HashCalculator:
-    def __init__(self, algorithm: str = 'sha256'):
-        # 验证算法安全性
+    def __init__(self, algorithm: str = DEFAULT_HASH_ALGORITHM):
+        # 验证算法安全性：完整哈希相同即判定为重复并可能被删除，只接受抗碰撞的算法
+        # （xxHash 等非加密哈希只用于多阶段中的预筛选）
         secure_algorithms = {'sha256', 'sha384', 'sha512', 'sha3_256', 'sha3_384', 'sha3_512'}
+        if HAS_BLAKE3:
+            secure_algorithms.add('blake3')
         if algorithm.lower() not in secure_algorithms:
             raise ValueError(f"不安全的哈希算法: {algorithm}，仅支持: {', '.join(secure_algorithms)}")
         self.algorithm = algorithm.lower()
+        # 每个文件都要新建哈希对象，构造函数在这里解析一次
+        self.new_hasher = hasher_factory(self.algorithm)
 
     def calculate_file_hash(self, file_path: str, progress_callback: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
-        """计算文件的完整哈希值"""
+        """
+        计算文件的完整哈希值
+
+        直接使用文件描述符：不创建 FileIO/BufferedReader，文件大小取自打开后的 fstat；
+        小文件按大小一次 os.read 读完，大文件 mmap 后交给 hashlib。
+        """
         try:
-            hasher = hashlib.new(self.algorithm)
-            file_size = os.path.getsize(file_path)
+            fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        except OSError as e:
+            logger.warning(f"无法读取文件 {file_path}: {e}")
+            return None
+        try:
+            hasher = self.new_hasher()
+            file_size = os.fstat(fd).st_size
             bytes_read = 0
-            last_progress_report = 0
 
-            with open(file_path, 'rb') as f:
+            advise_sequential_read(fd)
+            if file_size >= MMAP_MIN_SIZE:
+                # 大文件：mmap 后直接把内存视图交给 hashlib（释放 GIL，无额外拷贝）
+                with map_file_readonly(fd, file_size) as mm:
+                    if progress_callback is None:
+                        hasher.update(mm)
+                        bytes_read = len(mm)
+                    else:
+                        with memoryview(mm) as view:
+                            # 分段越大，Python 层的切片和回调越少；8MB 对 GUI 仍足够细
+                            for offset in range(0, len(view), MMAP_PROGRESS_STRIDE):
+                                hasher.update(view[offset:offset + MMAP_PROGRESS_STRIDE])
+                                bytes_read = min(offset + MMAP_PROGRESS_STRIDE, len(view))
+                                progress_callback(bytes_read, file_size)
+                release_page_cache(fd, file_size)
+            else:
+                # 多申请 1 字节：文件未变化时第二次读取立即返回空
                 while True:
-                    chunk = f.read(HASH_CHUNK_SIZE)
+                    chunk = os.read(fd, file_size + 1)
                     if not chunk:
                         break
                     hasher.update(chunk)
                     bytes_read += len(chunk)
 
-                    # Only report progress at intervals to avoid overwhelming the GUI
-                    if progress_callback and file_size > 0:
-                        if bytes_read - last_progress_report >= HASH_PROGRESS_INTERVAL:
-                            progress_callback(bytes_read, file_size)
-                            last_progress_report = bytes_read
-
-                # Final progress report
-                if progress_callback and file_size > 0:
-                    progress_callback(bytes_read, file_size)
+            # Final progress report
+            if progress_callback and file_size > 0:
+                progress_callback(bytes_read, file_size)
 
             return hasher.hexdigest()
         except (OSError, PermissionError) as e:
@@ -228,11 +484,95 @@ class HashCalculator:
         except Exception as e:
             logger.error(f"哈希计算失败 {file_path}: {e}", exc_info=True)
             return None
+        finally:
+            os.close(fd)
+
+    def hash_many(self, paths: List[str], max_workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+        """
+        用线程池并行计算多个文件的完整哈希
+
+        hashlib 在 update() 期间释放 GIL，多个线程可以同时读取和哈希，掩盖逐个文件的读取延迟。
+
+        Args:
+            paths: 文件路径列表
+            max_workers: 线程数，默认为 CPU 数的 HASH_MANY_WORKERS_PER_CPU 倍
+
+        Returns:
+            {path: hash_value} 字典，无法读取的文件对应 None
+        """
+        return self._map_parallel(self.calculate_file_hash, paths, max_workers)
+
+    def hash_duplicates(
+        self,
+        file_infos: List[FileInfo],
+        max_workers: Optional[int] = None
+    ) -> Dict[str, List[FileInfo]]:
+        """
+        找出内容相同的文件：大小 → 文件头哈希 → 完整哈希逐级筛选
+
+        大小唯一的文件不可能重复，完全不读取。不超过 DUPLICATE_HEAD_SIZE 的文件一次读完，
+        文件头哈希即完整哈希；更大的文件先比较头尾各 HEAD_TAIL_PROBE_SIZE 字节，
+        仍有重复的才计算完整哈希。
+
+        Returns:
+            {hash_value: [FileInfo, ...]}，只包含 2 个及以上文件的组
+        """
+        size_groups: Dict[int, List[FileInfo]] = {}
+        for file_info in file_infos:
+            size_groups.setdefault(file_info.size, []).append(file_info)
+        candidates = [f for group in size_groups.values() if len(group) > 1 for f in group]
+
+        sizes = {f.path: f.size for f in candidates}
+
+        def probe(path: str) -> Any:
+            size = sizes[path]
+            if size <= DUPLICATE_HEAD_SIZE:
+                return self.calculate_partial_hash(path, DUPLICATE_HEAD_SIZE)
+            return self.calculate_head_tail_hash(path, size)
+
+        head_hashes = self._map_parallel(probe, list(sizes), max_workers)
+        head_groups: Dict[Tuple[int, Any], List[FileInfo]] = {}
+        for file_info in candidates:
+            head_hash = head_hashes[file_info.path]
+            if head_hash is not None:
+                head_groups.setdefault((file_info.size, head_hash), []).append(file_info)
+
+        hash_groups: Dict[str, List[FileInfo]] = {}
+        needs_full = []
+        for (size, head_hash), group in head_groups.items():
+            if len(group) < 2:
+                continue
+            if size <= DUPLICATE_HEAD_SIZE:
+                hash_groups[head_hash] = group
+            else:
+                needs_full.extend(group)
+
+        full_hashes = self.hash_many([f.path for f in needs_full], max_workers)
+        for file_info in needs_full:
+            hash_value = full_hashes[file_info.path]
+            if hash_value is not None:
+                hash_groups.setdefault(hash_value, []).append(file_info)
+
+        return {h: group for h, group in hash_groups.items() if len(group) > 1}
+
+    @staticmethod
+    def _map_parallel(
+        fn: Callable[[str], Any],
+        paths: List[str],
+        max_workers: Optional[int]
+    ) -> Dict[str, Any]:
+        """在线程池中对每个路径执行 fn，返回 {path: 结果}"""
+        if not paths:
+            return {}
+        if max_workers is None:
+            max_workers = (os.cpu_count() or 4) * HASH_MANY_WORKERS_PER_CPU
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+            return dict(zip(paths, executor.map(fn, paths)))
 
     def calculate_partial_hash(self, file_path: str, sample_size: int = 1024 * 1024) -> Optional[str]:
         """计算文件的部分哈希值（仅读取前N字节）"""
         try:
-            hasher = hashlib.new(self.algorithm)
+            hasher = self.new_hasher()
             with open(file_path, 'rb') as f:
                 chunk = f.read(sample_size)
                 hasher.update(chunk)
@@ -240,3 +580,36 @@ class HashCalculator:
         except (OSError, PermissionError) as e:
             logger.warning(f"无法读取文件 {file_path}: {e}")
             return None
+
+    def calculate_head_tail_hash(
+        self,
+        file_path: str,
+        file_size: Optional[int] = None,
+        probe_size: int = HEAD_TAIL_PROBE_SIZE
+    ) -> Optional[int]:
+        """
+        计算文件开头和结尾各 probe_size 字节的 CRC32，用于计算完整哈希前的快速预筛选
+
+        格式相同的文件往往文件头一致，内容差异多出现在结尾，头尾一起比较能多筛掉一批；
+        每个文件最多两次小读取。CRC32 不抗碰撞，结果相同不能说明文件重复。
+        file_size 未提供时通过 fstat 获取。
+        """
+        # os.open + pread 直接读取，不创建带缓冲的文件对象
+        try:
+            fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        except OSError as e:
+            logger.debug(f"无法读取文件头尾: {file_path} - {e}")
+            return None
+        try:
+            if file_size is None:
+                file_size = os.fstat(fd).st_size
+            crc = zlib.crc32(_read_at(fd, probe_size, 0))
+            if file_size > probe_size:
+                # 不超过两个探测窗口的文件，尾部从头部窗口之后开始读，不重复读取
+                crc = zlib.crc32(_read_at(fd, probe_size, max(probe_size, file_size - probe_size)), crc)
+            return crc
+        except OSError as e:
+            logger.debug(f"无法读取文件头尾: {file_path} - {e}")
+            return None
+        finally:
+            os.close(fd)
@@ -3,17 +3,22 @@ import sys
 import subprocess
 import platform
 import json
+import re
+import threading
 import time
+from collections import deque
 from datetime import datetime, timedelta
 from pathlib import Path
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QTextEdit, QProgressBar, QFileDialog,
     QTreeWidget, QTreeWidgetItem, QSplitter, QGroupBox, QMessageBox,
-    QListWidget, QAbstractItemView, QCheckBox, QMenu, QDialog,
+    QListWidget, QListWidgetItem, QAbstractItemView, QCheckBox, QMenu, QDialog,
     QDialogButtonBox, QRadioButton, QButtonGroup, QLineEdit, QSpinBox, QTabWidget
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QPoint, QMimeData
+from PyQt6.QtCore import (
+    Qt, QThread, QTimer, pyqtSignal, QPoint, QMimeData, QObject, QRunnable, QThreadPool
+)
 from PyQt6.QtGui import QFont, QAction, QDropEvent
 
 from file_scanner import FileScanner, HashCalculator, FileInfo
@@ -30,6 +35,12 @@ try:
 except ImportError:
     SIMILARITY_AVAILABLE = False
 
+# 可做相似度检测的扩展名（图片 + 视频），检测器不可用时为空
+_MEDIA_EXTENSIONS = (
+    frozenset(SimilarityDetector.IMAGE_EXTENSIONS | SimilarityDetector.VIDEO_EXTENSIONS)
+    if SIMILARITY_AVAILABLE else frozenset()
+)
+
 # Try to import send2trash for safe deletion
 try:
     from send2trash import send2trash
@@ -51,6 +62,19 @@ FILE_TYPES = [
     "自定义 (在下方输入框中编辑)",
 ]
 
+# 自定义扩展名输入（空格或逗号分隔，支持 .ext 或 ext）
+_CUSTOM_EXT_RE = re.compile(r'[,\s]?([.\w]+)')
+# 文件类型说明中括号内的 *.ext
+_PATTERN_EXT_RE = re.compile(r'\*\.(\w+)')
+# 每个文件类型对应的扩展名集合，启动时解析一次
+FILE_TYPE_EXTENSIONS = {
+    file_type: frozenset(f'.{ext}' for ext in _PATTERN_EXT_RE.findall(file_type))
+    for file_type in FILE_TYPES
+}
+
+SEARCH_DEBOUNCE_MS = 150  # 搜索框停止输入该时长后才过滤结果，连续按键只过滤一次
+DELETION_HISTORY_LIMIT = 100  # 删除历史保留的最近记录数
+
 
 class ScanThread(QThread):
     progress_update = pyqtSignal(int, int, str)
@@ -72,6 +96,8 @@ class ScanThread(QThread):
 
     def run(self):
         try:
+            # 回调由 ProgressReporter 的上报线程每 PROGRESS_REPORT_INTERVAL (50ms) 调用一次，
+            # 信号频率已低于 20 次/秒，这里无需再节流；跨线程的 AutoConnection 即为队列连接
             results = self.finder.find_duplicates(
                 self.root_path,
                 scan_progress_callback=lambda c, t: self.progress_update.emit(c, t, "scan"),
@@ -112,6 +138,56 @@ class SimilarityScanThread(QThread):
             self.error_occurred.emit(str(e))
 
 
+class _HistorySignals(QObject):
+    """_HistoryLoader 的信号载体（QRunnable 本身不能定义信号）"""
+    loaded = pyqtSignal(list)
+
+
+class _HistoryLoader(QRunnable):
+    """在线程池中解析删除历史，避免大文件的 json 解析拖慢窗口首次显示
+
+    历史文件每行一条 JSON 记录（JSONL），只解析最后 DELETION_HISTORY_LIMIT 行；
+    旧版本写出的整个 JSON 数组仍可读取，下次保存时转换为 JSONL。
+    """
+
+    def __init__(self, path: str, log):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.path = path
+        self.log = log
+        self.history = []
+        self.line_count = 0  # 文件中的记录行数，旧格式为 None（需要整体重写）
+        self.done = threading.Event()
+        # 在 GUI 线程创建，信号经队列连接回到 GUI 线程
+        self.signals = _HistorySignals()
+
+    def run(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as f:
+                    first = f.read(1)
+                    while first.isspace():
+                        first = f.read(1)
+                    f.seek(0)
+                    if first == b'[':
+                        self.history = json.load(f)[-DELETION_HISTORY_LIMIT:]
+                        self.line_count = None
+                    else:
+                        tail = deque(maxlen=DELETION_HISTORY_LIMIT)
+                        for line in f:
+                            if line.strip():
+                                tail.append(line)
+                                self.line_count += 1
+                        self.history = [json.loads(line) for line in tail]
+        except Exception as e:
+            self.log.warning(f"加载删除历史失败: {e}")
+            self.history = []
+            self.line_count = None
+        finally:
+            self.done.set()
+        self.signals.loaded.emit(self.history)
+
+
 class DuplicateFileFinderGUI(QMainWindow):
     DELETION_HISTORY_FILE = "deletion_history.json"
 
@@ -124,7 +200,14 @@ class DuplicateFileFinderGUI(QMainWindow):
         self.scan_thread = None
         self.selected_path = ""
         self.duplicate_groups = []
-        self.deletion_history = self._load_deletion_history()
+        # 结果树的搜索索引: [[组节点, 是否隐藏, [[文件节点, 小写文件名, 小写路径, 是否隐藏], ...]], ...]
+        self._search_index = []
+        # 删除历史在后台加载，加载完成前为空列表
+        self.deletion_history = []
+        self._history_lines = 0
+        self._history_loader = _HistoryLoader(self.DELETION_HISTORY_FILE, self.log)
+        self._history_loader.signals.loaded.connect(self._on_history_loaded)
+        QThreadPool.globalInstance().start(self._history_loader)
         self.dark_mode = False
         # Similarity detection
         self.similarity_thread = None
@@ -160,13 +243,16 @@ class DuplicateFileFinderGUI(QMainWindow):
         # Load default file types
         default_extensions = self.config.get("default_extensions", [])
         if default_extensions:
+            # 列表项按文本建一次索引，避免对每个扩展名都逐项跨 Qt 读取文本
+            items_by_text = {}
+            for i in range(self.file_type_list.count()):
+                item = self.file_type_list.item(i)
+                items_by_text[item.text()] = item
+                item.setCheckState(Qt.CheckState.Unchecked)
             for ext in default_extensions:
-                for i in range(self.file_type_list.count()):
-                    item = self.file_type_list.item(i)
-                    if item.text() == ext:
-                        item.setCheckState(Qt.CheckState.Checked)
-                    else:
-                        item.setCheckState(Qt.CheckState.Unchecked)
+                item = items_by_text.get(ext)
+                if item is not None:
+                    item.setCheckState(Qt.CheckState.Checked)
 
     def init_ui(self):
         self.setWindowTitle("重复文件查找器")
@@ -206,15 +292,15 @@ class DuplicateFileFinderGUI(QMainWindow):
 
         self.file_type_list = QListWidget()
         self.file_type_list.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        # 先设置好勾选状态再加入列表，省去按下标回查；填充期间屏蔽信号
+        self.file_type_list.blockSignals(True)
         for file_type in FILE_TYPES:
-            item = self.file_type_list.addItem(file_type)
-            # Get the item we just added and make it checkable
-            item_widget = self.file_type_list.item(self.file_type_list.count() - 1)
-            item_widget.setFlags(item_widget.flags() | Qt.ItemFlag.ItemIsUserCheckable)
-            item_widget.setCheckState(Qt.CheckState.Checked)
+            item = QListWidgetItem(file_type)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
             # 默认取消"自定义"选项
-            if "自定义" in file_type:
-                item_widget.setCheckState(Qt.CheckState.Unchecked)
+            item.setCheckState(Qt.CheckState.Unchecked if "自定义" in file_type else Qt.CheckState.Checked)
+            self.file_type_list.addItem(item)
+        self.file_type_list.blockSignals(False)
 
         # 连接列表项点击事件，用于处理自定义选项
         self.file_type_list.itemClicked.connect(self.on_file_type_item_clicked)
@@ -361,7 +447,12 @@ class DuplicateFileFinderGUI(QMainWindow):
         search_label = QLabel("搜索:")
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("输入文件名或路径进行过滤...")
-        self.search_input.textChanged.connect(self.filter_results)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(lambda: self.filter_results(self.search_input.text()))
+        # 每次输入重新计时（QTimer.start 有带毫秒参数的重载，不直接接收 textChanged 的文本）
+        self.search_input.textChanged.connect(lambda _text: self._search_timer.start())
         self.clear_search_button = QPushButton("清除")
         self.clear_search_button.clicked.connect(self.clear_search)
         self.clear_search_button.setEnabled(False)
@@ -511,12 +602,10 @@ class DuplicateFileFinderGUI(QMainWindow):
                     if custom_ext_text:
                         # 保存自定义扩展名到配置
                         self.config.set("custom_extensions", custom_ext_text)
-                        # 解析扩展名（支持空格或逗号分隔）
-                        import re
                         # 移除多余的空格和换行
                         custom_ext_text = ' '.join(custom_ext_text.split())
                         # 匹配扩展名（支持 .ext 或 ext 格式）
-                        ext_matches = re.findall(r'[,\s]?([.\w]+)', custom_ext_text)
+                        ext_matches = _CUSTOM_EXT_RE.findall(custom_ext_text)
                         for ext in ext_matches:
                             if ext:
                                 # 确保以点开头
@@ -526,21 +615,9 @@ class DuplicateFileFinderGUI(QMainWindow):
                 elif "所有文件" in text:
                     # 所有文件选中，返回 None 表示不筛选
                     return None
-                elif "*.pdf" in text:
-                    extensions.update(['.pdf'])
-                elif "*.doc" in text:
-                    extensions.update(['.doc', '.docx'])
-                elif "*.xls" in text:
-                    extensions.update(['.xls', '.xlsx'])
-                elif "*.ppt" in text:
-                    extensions.update(['.ppt', '.pptx'])
-                elif "*.txt" in text:
-                    extensions.add('.txt')
                 else:
-                    # Extract all extensions from parentheses
-                    import re
-                    matches = re.findall(r'\*\.(\\w+)', text)
-                    extensions.update(f'.{ext}' for ext in matches)
+                    # 括号内列出的扩展名已在模块加载时解析
+                    extensions |= FILE_TYPE_EXTENSIONS.get(text, frozenset())
         return extensions if extensions else None  # None means all files
 
     def browse_directory(self):
@@ -584,6 +661,7 @@ class DuplicateFileFinderGUI(QMainWindow):
         self.advanced_select_button.setEnabled(False)
         self.export_button.setEnabled(False)
         self.results_tree.clear()
+        self._search_index = []
 
     def stop_scan(self):
         if self.scan_thread:
@@ -592,6 +670,14 @@ class DuplicateFileFinderGUI(QMainWindow):
         self.statusBar().showMessage("正在停止...")
 
     def update_progress(self, current: int, total: int, stage: str):
+        if stage == "scan" and total <= 0:
+            # 扫描时事先不知道文件总数，进度条显示为忙碌状态
+            self.progress_bar.setRange(0, 0)
+            self.status_label.setText(f"扫描中... 已发现 {current} 个文件")
+            self.last_progress_update = time.time()
+            return
+
+        self._reset_progress_range()
         percentage = int((current / total * 100)) if total > 0 else 0
         self.progress_bar.setValue(percentage)
 
@@ -611,6 +697,11 @@ class DuplicateFileFinderGUI(QMainWindow):
 
         self.last_progress_update = time.time()
 
+    def _reset_progress_range(self):
+        """结束扫描阶段的忙碌状态，恢复百分比进度条"""
+        if self.progress_bar.maximum() == 0:
+            self.progress_bar.setRange(0, 100)
+
     def _calculate_eta(self, current: int, total: int) -> str:
         """计算预计剩余时间"""
         if not self.scan_start_time or current <= 0 or total <= 0:
@@ -647,6 +738,7 @@ class DuplicateFileFinderGUI(QMainWindow):
         self.statusBar().showMessage("正在停止...")
 
     def scan_complete(self, results: list, wasted_space: int, scanned_files: list = None):
+        self._reset_progress_range()
         self.duplicate_groups = results
         # Store scanned files for similarity detection
         if scanned_files is not None:
@@ -668,11 +760,11 @@ class DuplicateFileFinderGUI(QMainWindow):
         # Enable similarity button if we have scanned files
         if self.similarity_button and self.scanned_files:
             # Check if there are any image or video files
+            # os.path.splitext 不创建 Path 对象，扩展名只取一次、查一个集合，找到即停止
             has_images_or_videos = any(
-                Path(f.path).suffix.lower() in SimilarityDetector.IMAGE_EXTENSIONS or
-                Path(f.path).suffix.lower() in SimilarityDetector.VIDEO_EXTENSIONS
+                os.path.splitext(f.name)[1].lower() in _MEDIA_EXTENSIONS
                 for f in self.scanned_files
-            ) if SIMILARITY_AVAILABLE else False
+            )
             self.similarity_button.setEnabled(has_images_or_videos)
 
         self.status_label.setText("扫描完成")
@@ -715,6 +807,7 @@ class DuplicateFileFinderGUI(QMainWindow):
         QMessageBox.warning(self, "权限问题", message)
 
     def scan_error(self, error: str):
+        self._reset_progress_range()
         QMessageBox.critical(self, "错误", f"扫描过程中发生错误:\n{error}")
         self.scan_button.setEnabled(True)
         self.stop_button.setEnabled(False)
@@ -725,33 +818,40 @@ class DuplicateFileFinderGUI(QMainWindow):
         """根据搜索文本过滤结果"""
         search_text_lower = search_text.lower().strip()
 
-        root = self.results_tree.invisibleRootItem()
-        for i in range(root.childCount()):
-            group_item = root.child(i)
-
-            # Check if any file in this group matches
-            group_has_match = False
-            for j in range(group_item.childCount()):
-                file_item = group_item.child(j)
-                file_name = file_item.text(1).lower()
-                file_path = file_item.text(2).lower()
-
-                if search_text_lower in file_name or search_text_lower in file_path:
-                    file_item.setHidden(False)
-                    group_has_match = True
-                else:
-                    file_item.setHidden(True)
-
-            # Hide group if no files match
-            group_item.setHidden(not group_has_match)
+        # 使用填充结果时缓存的小写文本，只在隐藏状态变化时调用 setHidden；
+        # 整个过程暂停重绘，结束后统一刷新一次
+        visible_groups = 0
+        self.results_tree.setUpdatesEnabled(False)
+        self.results_tree.blockSignals(True)
+        try:
+            for group_entry in self._search_index:
+                group_item, group_hidden, file_entries = group_entry
+
+                # Check if any file in this group matches
+                group_has_match = False
+                for file_entry in file_entries:
+                    file_item, name_lower, path_lower, file_hidden = file_entry
+                    matched = search_text_lower in name_lower or search_text_lower in path_lower
+                    group_has_match = group_has_match or matched
+                    if file_hidden == matched:
+                        file_item.setHidden(not matched)
+                        file_entry[3] = not matched
+
+                # Hide group if no files match
+                if group_hidden == group_has_match:
+                    group_item.setHidden(not group_has_match)
+                    group_entry[1] = not group_has_match
+                if group_has_match:
+                    visible_groups += 1
+        finally:
+            self.results_tree.blockSignals(False)
+            self.results_tree.setUpdatesEnabled(True)
 
         # Enable/disable clear button
         self.clear_search_button.setEnabled(bool(search_text))
 
         # Update status bar with filter info
         if search_text_lower:
-            visible_groups = sum(1 for i in range(root.childCount())
-                               if not root.child(i).isHidden())
             self.statusBar().showMessage(f"过滤: 显示 {visible_groups} 组结果")
         else:
             self.statusBar().showMessage("就绪")
@@ -862,6 +962,7 @@ class DuplicateFileFinderGUI(QMainWindow):
 
     def populate_results(self, results: list):
         self.results_tree.clear()
+        self._search_index = []
         self.results_tree.itemChanged.disconnect()  # Disconnect during population
 
         try:
@@ -879,20 +980,22 @@ class DuplicateFileFinderGUI(QMainWindow):
                 # Don't allow group item to be checked
                 group_item.setFlags(group_item.flags() & ~Qt.ItemFlag.ItemIsUserCheckable)
 
+                file_entries = []
+                self._search_index.append([group_item, False, file_entries])
                 for file_info in group.files:
                     file_item = QTreeWidgetItem(group_item)
-                    file_path = Path(file_info.path)
 
                     # Add checkbox
                     file_item.setFlags(file_item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
                     file_item.setCheckState(0, Qt.CheckState.Unchecked)
 
-                    file_item.setText(1, file_path.name)
-                    file_item.setText(2, str(file_path.parent))
+                    file_item.setText(1, file_info.name)
+                    file_item.setText(2, file_info.directory)
                     file_item.setText(3, format_size(file_info.size))
 
                     # Store full path in data for easy access
                     file_item.setData(0, Qt.ItemDataRole.UserRole, file_info.path)
+                    file_entries.append([file_item, file_info.name.lower(), file_info.directory.lower(), False])
 
             self.results_tree.expandAll()
         finally:
@@ -1021,6 +1124,7 @@ class DuplicateFileFinderGUI(QMainWindow):
         else:
             # Clear results and suggest rescan
             self.results_tree.clear()
+            self._search_index = []
             self.duplicate_groups = []
             self.delete_button.setEnabled(False)
             self.smart_select_button.setEnabled(False)
@@ -1329,15 +1433,20 @@ class DuplicateFileFinderGUI(QMainWindow):
 
         return 0
 
-    def _load_deletion_history(self) -> list:
-        """加载删除历史记录"""
-        try:
-            if os.path.exists(self.DELETION_HISTORY_FILE):
-                with open(self.DELETION_HISTORY_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except Exception as e:
-            self.log.warning(f"加载删除历史失败: {e}")
-        return []
+    def _on_history_loaded(self, history: list):
+        """后台加载完成后接收删除历史"""
+        if self._history_loader is not None:
+            self.deletion_history = history
+            self._history_lines = self._history_loader.line_count
+            self._history_loader = None
+
+    def _ensure_deletion_history(self):
+        """确保删除历史已加载；后台任务未完成时等待它，避免写入时覆盖旧记录"""
+        if self._history_loader is not None:
+            self._history_loader.done.wait()
+            self.deletion_history = self._history_loader.history
+            self._history_lines = self._history_loader.line_count
+            self._history_loader = None
 
     def _save_deletion_record(self, files_info: list):
         """保存删除记录到历史"""
@@ -1348,15 +1457,23 @@ class DuplicateFileFinderGUI(QMainWindow):
             'files': files_info
         }
 
+        self._ensure_deletion_history()
         self.deletion_history.append(record)
 
         # Keep only last 100 records
-        if len(self.deletion_history) > 100:
-            self.deletion_history = self.deletion_history[-100:]
+        if len(self.deletion_history) > DELETION_HISTORY_LIMIT:
+            self.deletion_history = self.deletion_history[-DELETION_HISTORY_LIMIT:]
 
         try:
-            with open(self.DELETION_HISTORY_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.deletion_history, f, ensure_ascii=False, indent=2)
+            # 平时只追加一行；旧格式或文件行数超过上限两倍时才整体重写，重写开销被摊销
+            if self._history_lines is None or self._history_lines >= 2 * DELETION_HISTORY_LIMIT:
+                with open(self.DELETION_HISTORY_FILE, 'w', encoding='utf-8') as f:
+                    f.writelines(json.dumps(r, ensure_ascii=False) + '\n' for r in self.deletion_history)
+                self._history_lines = len(self.deletion_history)
+            else:
+                with open(self.DELETION_HISTORY_FILE, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                self._history_lines += 1
             self.log.info(f"保存删除记录: {len(files_info)} 个文件")
         except Exception as e:
             self.log.error(f"保存删除历史失败: {e}")
@@ -1449,7 +1566,7 @@ class DuplicateFileFinderGUI(QMainWindow):
         # Filter files based on settings
         files_to_scan = []
         for file_info in self.scanned_files:
-            ext = Path(file_info.path).suffix.lower()
+            ext = os.path.splitext(file_info.name)[1].lower()
             if settings['check_images'] and ext in SimilarityDetector.IMAGE_EXTENSIONS:
                 files_to_scan.append(file_info)
             elif settings['check_videos'] and ext in SimilarityDetector.VIDEO_EXTENSIONS:
@@ -12,7 +12,6 @@ import sys
 import argparse
 from pathlib import Path
 
-from gui import main as gui_main
 from logger import get_logger
 
 
@@ -53,7 +52,7 @@ class DuplicateFinderCLI:
             print(f"文件类型过滤: {', '.join(extensions)}")
 
         # Create scanner and finder
-        scanner = FileScanner(extensions)
+        scanner = FileScanner(extensions, scan_workers=args.scan_workers)
         hash_calculator = HashCalculator()
         finder = DuplicateFinder(
             scanner,
@@ -65,15 +64,23 @@ class DuplicateFinderCLI:
 
         # Scan for duplicates
         try:
+            scan_reported = [0]
+
             def scan_progress(current, total):
-                if total > 0 and current % max(1, total // 20) == 0:
-                    pct = int(current / total * 100)
-                    print(f"  扫描进度: {pct}% ({current}/{total})")
+                # 扫描时文件总数未知（total 为 0），每发现一千个文件显示一次
+                if current // 1000 > scan_reported[0] // 1000:
+                    print(f"  扫描中: 已发现 {current} 个文件")
+                scan_reported[0] = current
+
+            hash_reported = [-5]
 
             def hash_progress(current, total):
-                if total > 0 and current % max(1, total // 20) == 0:
-                    pct = int(current / total * 100)
-                    print(f"  哈希进度: {pct}% ({current}/{total})")
+                # 进度由上报线程定时采样，计数很少恰好落在整 5% 上，按跨过的 5% 区间显示
+                if total > 0:
+                    pct = current * 100 // total
+                    if pct // 5 > hash_reported[0] // 5:
+                        print(f"  哈希进度: {pct}% ({current}/{total})")
+                        hash_reported[0] = pct
 
             results = finder.find_duplicates(
                 str(directory),
@@ -185,7 +192,7 @@ class DuplicateFinderCLI:
 
         print(f"正在扫描目录: {directory}")
 
-        scanner = FileScanner(None)  # Scan all files
+        scanner = FileScanner(None, scan_workers=args.scan_workers)  # Scan all files
         hash_calculator = HashCalculator()
         finder = DuplicateFinder(scanner, hash_calculator)
 
@@ -258,6 +265,8 @@ class DuplicateFinderCLI:
         scan_parser.add_argument('--no-parallel', action='store_true', help='禁用并行哈希计算')
         scan_parser.add_argument('--no-cache', action='store_true', help='禁用哈希缓存')
         scan_parser.add_argument('--no-multi-stage', action='store_true', help='禁用多阶段哈希')
+        scan_parser.add_argument('--scan-workers', type=int, default=1,
+                                 help='并行遍历顶层子目录的线程数（适合网络文件系统，默认: 1）')
 
         # Export command
         export_parser = subparsers.add_parser('export', help='扫描并导出报告')
@@ -266,6 +275,8 @@ class DuplicateFinderCLI:
                                    default='html', help='导出格式（默认: html）')
         export_parser.add_argument('-o', '--output', help='输出文件路径')
         export_parser.add_argument('--minimal', action='store_true', help='不包含完整元数据')
+        export_parser.add_argument('--scan-workers', type=int, default=1,
+                                   help='并行遍历顶层子目录的线程数（适合网络文件系统，默认: 1）')
 
         return parser
 
@@ -277,6 +288,8 @@ def main():
 
     # If no command specified, launch GUI
     if args.command is None:
+        # PyQt6 只在 GUI 模式下导入，CLI 启动无需加载
+        from gui import main as gui_main
         gui_main()
     else:
         # Run CLI mode
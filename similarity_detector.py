@@ -4,6 +4,7 @@
 使用感知哈希算法检测近似相似的图片和视频文件。
 """
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional, Callable, TYPE_CHECKING
 from dataclasses import dataclass
@@ -12,19 +13,31 @@ from enum import Enum
 if TYPE_CHECKING:
     import imagehash
 
-try:
-    from PIL import Image
-    import imagehash
-    HAS_PILLOW = True
-except ImportError:
-    HAS_PILLOW = False
-    imagehash = None  # type: ignore
+# Pillow/imagehash（依赖 numpy、scipy）和 OpenCV 导入很慢，
+# 这里只检查是否已安装，真正的导入推迟到首次使用时
+HAS_PILLOW = find_spec('PIL') is not None and find_spec('imagehash') is not None
+HAS_OPENCV = find_spec('cv2') is not None
+
+Image = None
+imagehash = None  # type: ignore
+cv2 = None
+
+
+def _import_image_libs():
+    """按需导入 Pillow 和 imagehash"""
+    global Image, imagehash
+    if imagehash is None:
+        from PIL import Image as _Image
+        import imagehash as _imagehash
+        Image, imagehash = _Image, _imagehash
+
 
-try:
-    import cv2
-    HAS_OPENCV = True
-except ImportError:
-    HAS_OPENCV = False
+def _import_opencv():
+    """按需导入 OpenCV"""
+    global cv2
+    if cv2 is None:
+        import cv2 as _cv2
+        cv2 = _cv2
 
 from logger import get_logger
 from file_scanner import FileInfo
@@ -100,6 +113,7 @@ class SimilarityDetector:
             return None
 
         try:
+            _import_image_libs()
             with Image.open(image_path) as img:
                 # 转换为 RGB 模式（处理 RGBA 等格式）
                 if img.mode != 'RGB':
@@ -137,6 +151,8 @@ class SimilarityDetector:
             return None
 
         try:
+            _import_image_libs()
+            _import_opencv()
             cap = cv2.VideoCapture(video_path)
             if not cap.isOpened():
                 return None
@@ -210,6 +226,7 @@ class SimilarityDetector:
         if num_frames == 0:
             return 0.0
 
+        _import_image_libs()
         total_similarity = 0.0
         for i in range(num_frames):
             # 计算汉明距离
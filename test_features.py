@@ -103,7 +103,7 @@ def test_hash_calculator():
     print("测试 2: 哈希计算器")
     print("="*50)
 
-    from file_scanner import HashCalculator
+    from file_scanner import FileScanner, HashCalculator
 
     test_dir, files = create_test_files()
 
@@ -131,6 +131,23 @@ def test_hash_calculator():
             print("✗ 错误: 文件1和文件3应该有不同的哈希")
             return False
 
+        # 并行批量计算应与逐个计算结果一致
+        hashes = calculator.hash_many(files[:3])
+        if hashes == {files[0]: hash1, files[1]: hash2, files[2]: hash3}:
+            print("✓ 并行批量哈希结果与逐个计算一致")
+        else:
+            print("✗ 错误: hash_many 结果与 calculate_file_hash 不一致")
+            return False
+
+        # 逐级筛选只应找出文件1和文件2这一组
+        scanned = FileScanner().scan_directory(test_dir)
+        groups = calculator.hash_duplicates(scanned)
+        if sorted(sorted(f.path for f in g) for g in groups.values()) == [sorted(files[:2])]:
+            print("✓ hash_duplicates 逐级筛选结果正确")
+        else:
+            print("✗ 错误: hash_duplicates 结果不正确")
+            return False
+
         return True
 
     except Exception as e:
@@ -191,6 +208,89 @@ def test_duplicate_finder():
         cleanup_test_files(test_dir)
 
 
+def test_multi_stage_paths():
+    """测试多阶段哈希各路径与完整哈希分组一致"""
+    print("\n" + "="*50)
+    print("测试 3b: 多阶段哈希路径")
+    print("="*50)
+
+    from file_scanner import FileScanner, HashCalculator
+    from duplicate_finder import (
+        DuplicateFinder, MULTI_STAGE_MIN_FILE_SIZE, MULTI_STAGE_MIN_LARGE_FILES,
+        INCREMENTAL_MAX_GROUP_FILES
+    )
+
+    test_dir = tempfile.mkdtemp(prefix="duplicate_finder_test_")
+
+    def write(name, data):
+        path = os.path.join(test_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    try:
+        # 超过增量分组上限的大文件组：触发多阶段哈希并走逐个完整哈希
+        large = os.urandom(MULTI_STAGE_MIN_FILE_SIZE + 4096)
+        for i in range(max(MULTI_STAGE_MIN_LARGE_FILES, INCREMENTAL_MAX_GROUP_FILES + 1)):
+            write(f"large_{i}.bin", large)
+
+        size = 4 * 1024 * 1024
+        base = os.urandom(size)
+        # 只在 1.5MB 处（部分哈希采样窗口之间）不同：头尾探测和部分哈希都相同，
+        # 必须读到完整内容才能区分
+        offset = size * 3 // 8
+        changed = base[:offset] + bytes([base[offset] ^ 1]) + base[offset + 1:]
+
+        # 三个文件中一个不同：增量分组哈希
+        write("triple_a.bin", base)
+        write("triple_b.bin", base)
+        write("triple_c.bin", changed)
+        # 两个相同文件与两个中间不同的文件：逐字节比较（无缓存时）
+        pair = os.urandom(size)
+        write("pair_a.bin", pair)
+        write("pair_b.bin", pair)
+        other = os.urandom(size)
+        write("diff_a.bin", other)
+        write("diff_b.bin", other[:offset] + bytes([other[offset] ^ 1]) + other[offset + 1:])
+        # 硬链接与其源文件
+        linked = write("link_src.bin", os.urandom(size))
+        os.link(linked, os.path.join(test_dir, "link_dst.bin"))
+
+        scanned = FileScanner().scan_directory(test_dir)
+        calculator = HashCalculator()
+        by_hash = {}
+        for file_info in scanned:
+            key = (file_info.size, calculator.calculate_file_hash(file_info.path))
+            by_hash.setdefault(key, []).append(file_info.path)
+        expected = sorted(sorted(paths) for paths in by_hash.values() if len(paths) > 1)
+
+        for cache_enabled in (False, True):
+            finder = DuplicateFinder(
+                FileScanner(), HashCalculator(), cache_enabled=cache_enabled,
+                cache_path=os.path.join(test_dir, f"cache_{cache_enabled}.db")
+            )
+            results = finder.find_duplicates(test_dir)
+            actual = sorted(sorted(f.path for f in group.files) for group in results)
+            if actual == expected:
+                print(f"✓ 多阶段哈希结果与完整哈希分组一致 (缓存: {cache_enabled})")
+            else:
+                print(f"✗ 错误: 多阶段哈希结果不一致 (缓存: {cache_enabled})")
+                print(f"  期望: {expected}")
+                print(f"  实际: {actual}")
+                return False
+
+        return True
+
+    except Exception as e:
+        print(f"✗ 测试失败: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    finally:
+        cleanup_test_files(test_dir)
+
+
 def test_cache_manager():
     """测试缓存管理器"""
     print("\n" + "="*50)
@@ -500,6 +600,7 @@ def run_all_tests():
         ("文件扫描器", test_file_scanner),
         ("哈希计算器", test_hash_calculator),
         ("重复文件查找器", test_duplicate_finder),
+        ("多阶段哈希路径", test_multi_stage_paths),
         ("缓存管理器", test_cache_manager),
         ("配置管理器", test_config_manager),
         ("导出管理器", test_export_manager),